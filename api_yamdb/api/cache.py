@@ -0,0 +1,151 @@
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import caches
+from reviews.models import Category, Genre, Title
+from users.models import User
+
+SNAPSHOT_POLL_INTERVAL = 0.05
+
+_stats = Counter()
+_stats_lock = threading.Lock()
+
+
+def get_cache():
+    return caches[settings.CATALOG_CACHE_ALIAS]
+
+
+def _version_key(model):
+    return f'catalog:{model._meta.label_lower}:version'
+
+
+def get_version(model):
+    return get_cache().get_or_set(_version_key(model), time.time_ns, None)
+
+
+def _bump(key):
+    cache = get_cache()
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, time.time_ns(), None)
+
+
+def bump_version(model):
+    """Делает устаревшими все закэшированные ответы по модели."""
+    _bump(_version_key(model))
+
+
+def response_key(model, request):
+    return (f'catalog:{model._meta.label_lower}:{get_version(model)}:'
+            f'{request.get_host()}:{request.get_full_path()}')
+
+
+def _title_version_key(pk):
+    return f'catalog:reviews.title:{pk}:version'
+
+
+def forget_titles(pks):
+    """Делает устаревшими снимки ответов по этим произведениям."""
+    for pk in pks:
+        _bump(_title_version_key(pk))
+
+
+def _snapshot_key(pk):
+    # Версия Title сбрасывает снимки после пакетных пересчётов, версии
+    # Genre и Category — после правки любого жанра или категории.
+    keys = [_title_version_key(pk)] + [
+        _version_key(model) for model in (Title, Genre, Category)]
+    cache = get_cache()
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            versions[key] = cache.get_or_set(key, time.time_ns, None)
+    return f'catalog:reviews.title:{pk}:snapshot:' + ':'.join(
+        str(versions[key]) for key in keys)
+
+
+def get_title_snapshot(pk, build):
+    """Снимок ответа по произведению из кэша или от build().
+
+    При промахе build() вызывает только тот, кто взял блокировку через
+    cache.add; остальные ждут его результат, а не считают то же самое.
+    Если снимок так и не появился (build() упал, вышел таймаут), каждый
+    считает его сам без записи в кэш. Снимок живёт
+    TITLE_SNAPSHOT_TIMEOUT: с необщим кэшем сброс версий видит только
+    процесс, принявший запись.
+    """
+    cache = get_cache()
+    key = _snapshot_key(pk)
+    snapshot = cache.get(key)
+    if snapshot is not None:
+        record('hit')
+        return snapshot
+    record('miss')
+    lock_key = f'{key}:lock'
+    timeout = settings.TITLE_SNAPSHOT_LOCK_TIMEOUT
+    if cache.add(lock_key, 1, timeout):
+        try:
+            snapshot = build()
+            cache.set(key, snapshot, settings.TITLE_SNAPSHOT_TIMEOUT)
+            return snapshot
+        finally:
+            cache.delete(lock_key)
+    deadline = time.monotonic() + timeout
+    while cache.get(lock_key) is not None and time.monotonic() < deadline:
+        time.sleep(SNAPSHOT_POLL_INTERVAL)
+    snapshot = cache.get(key)
+    return snapshot if snapshot is not None else build()
+
+
+def _parent_key(model, pk):
+    return f'parent:{model._meta.label_lower}:{pk}'
+
+
+def get_parent(model, pk, *fields):
+    """Значения полей родительского объекта или None, если его нет."""
+    cache = get_cache()
+    key = _parent_key(model, pk)
+    values = cache.get(key)
+    if values is None:
+        values = model.objects.filter(pk=pk).values('pk', *fields).first()
+        if values is not None:
+            cache.set(key, values, settings.PARENT_CACHE_TIMEOUT)
+    return values
+
+
+def forget_parent(model, pk):
+    get_cache().delete(_parent_key(model, pk))
+
+
+def _token_version_key(user_id):
+    return f'auth:token_version:{user_id}'
+
+
+def get_token_version(user_id):
+    """Текущая версия токенов пользователя; None, если его нет."""
+    cache = get_cache()
+    key = _token_version_key(user_id)
+    version = cache.get(key)
+    if version is None:
+        version = User.objects.filter(pk=user_id).values_list(
+            'token_version', flat=True).first()
+        if version is not None:
+            cache.set(key, version, settings.TOKEN_VERSION_CACHE_TIMEOUT)
+    return version
+
+
+def forget_token_version(user_id):
+    get_cache().delete(_token_version_key(user_id))
+
+
+def record(event):
+    with _stats_lock:
+        _stats[event] += 1
+
+
+def cache_stats():
+    with _stats_lock:
+        return {'hit': _stats['hit'], 'miss': _stats['miss']}
@@ -0,0 +1,74 @@
+"""Настройка соединений с БД и их состояние для health check."""
+import threading
+import time
+import weakref
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+_wrappers = weakref.WeakSet()
+_created = 0
+_lock = threading.Lock()
+
+PG_ACTIVITY = '''
+    SELECT count(*) FILTER (WHERE state = 'active'),
+           count(*) FILTER (WHERE state <> 'active'),
+           count(*),
+           current_setting('max_connections')::int
+    FROM pg_stat_activity
+    WHERE datname = current_database()
+'''
+
+
+def configure_connection(connection):
+    """Применяет SQLITE_PRAGMAS и учитывает соединение в статистике."""
+    global _created
+    with _lock:
+        _wrappers.add(connection)
+        _created += 1
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        for name, value in settings.SQLITE_PRAGMAS.items():
+            cursor.execute(f'PRAGMA {name} = {value}')
+
+
+def pool_status():
+    """Соединения процесса: открытые сейчас и созданные с его запуска."""
+    with _lock:
+        wrappers = list(_wrappers)
+        created = _created
+    return {
+        'open': sum(wrapper.connection is not None for wrapper in wrappers),
+        'created': created,
+    }
+
+
+def check_database(alias=DEFAULT_DB_ALIAS):
+    """Проверяет соединение и собирает его настройки и загрузку."""
+    connection = connections[alias]
+    started = time.perf_counter()
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT 1')
+        cursor.fetchone()
+    report = {
+        'vendor': connection.vendor,
+        'latency_ms': round((time.perf_counter() - started) * 1000, 3),
+        'conn_max_age': connection.settings_dict['CONN_MAX_AGE'],
+        'connections': pool_status(),
+    }
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            cursor.execute('PRAGMA journal_mode')
+            report['journal_mode'] = cursor.fetchone()[0]
+        elif connection.vendor == 'postgresql':
+            cursor.execute(PG_ACTIVITY)
+            active, idle, total, limit = cursor.fetchone()
+            report['server'] = {
+                'active': active,
+                'idle': idle,
+                'total': total,
+                'max_connections': limit,
+                'utilization': round(total / limit, 3),
+            }
+    return report
@@ -0,0 +1,229 @@
+import json
+import math
+import random
+import statistics
+import time
+import tracemalloc
+
+from api.management.synthetic import (WORDS, bulk_create, create_categories,
+                                      create_titles)
+from api.v1.authentication import issue_token
+from django.core.management import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from reviews import ranking, search, stats
+from reviews.models import Comment, Genre, Review, Title
+from users.models import User
+
+BENCH_CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'bench_api',
+    },
+}
+
+
+def percentile(values, percent):
+    """Перцентиль методом ближайшего ранга."""
+    ordered = sorted(values)
+    return ordered[max(math.ceil(percent / 100 * len(ordered)) - 1, 0)]
+
+
+class Command(BaseCommand):
+    help = ('Нагрузочный прогон API на синтетическом каталоге: p50/p95 '
+            'задержки, число SQL-запросов и пик памяти по эндпоинтам в '
+            'JSON. Данные создаются в транзакции и откатываются.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--titles', type=int, default=10_000)
+        parser.add_argument('--reviews', type=int, default=10_000)
+        parser.add_argument('--comments', type=int, default=10_000)
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--requests', type=int, default=50,
+                            help='Число замеров на эндпоинт.')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--output', help='Файл для JSON-отчёта.')
+        parser.add_argument(
+            '--baseline',
+            help='Отчёт прошлого прогона: ошибка, если p95 или число '
+                 'запросов выросли сверх допуска.')
+        parser.add_argument('--tolerance', type=float, default=0.2)
+
+    def handle(self, *args, **kwargs):
+        for option in ('titles', 'users', 'requests'):
+            if kwargs[option] < 1:
+                raise CommandError(f'--{option} должно быть больше нуля.')
+        if kwargs['reviews'] > kwargs['titles'] * kwargs['users']:
+            raise CommandError(
+                'Отзывов больше, чем пар пользователь-произведение.')
+        random.seed(kwargs['seed'])
+        with override_settings(CACHES=BENCH_CACHES,
+                               CATALOG_CACHE_ALIAS='default'):
+            with transaction.atomic():
+                dataset = self.generate(kwargs)
+                endpoints = self.run(dataset, kwargs['requests'])
+                transaction.set_rollback(True)
+        report = {
+            'database': connection.vendor,
+            'dataset': dataset['sizes'],
+            'endpoints': endpoints,
+        }
+        output = json.dumps(report, ensure_ascii=False, indent=2)
+        if kwargs['output']:
+            with open(kwargs['output'], 'w', encoding='utf-8') as file:
+                file.write(output)
+        else:
+            self.stdout.write(output)
+        if kwargs['baseline']:
+            self.compare(endpoints, kwargs['baseline'], kwargs['tolerance'])
+
+    def generate(self, options):
+        started = time.monotonic()
+        users = bulk_create(User, (
+            User(username=f'bench_{idx}', email=f'bench_{idx}@yamdb.fake',
+                 password='!')
+            for idx in range(options['users'])
+        ))
+        categories = create_categories()
+        genres = bulk_create(Genre, (
+            Genre(name=f'Жанр {idx}', slug=f'bench-{idx}')
+            for idx in range(20)
+        ))
+        titles = create_titles(options['titles'], categories)
+        through = Title.genre.through
+        bulk_create(through, (
+            through(title_id=title_id, genre_id=genre_id)
+            for title_id in titles
+            for genre_id in random.sample(genres, random.randint(1, 3))
+        ), fetch_pks=False)
+        # Отзыв номер idx пишет автор idx // len(titles), так что пара
+        # (автор, произведение) не повторяется.
+        reviews = bulk_create(Review, (
+            Review(
+                title_id=titles[idx % len(titles)],
+                author_id=users[idx // len(titles)],
+                text=' '.join(random.choices(WORDS, k=20)),
+                score=random.randint(1, 10),
+            )
+            for idx in range(options['reviews'])
+        ))
+        if reviews:
+            bulk_create(Comment, (
+                Comment(
+                    review_id=random.choice(reviews),
+                    author_id=random.choice(users),
+                    text=' '.join(random.choices(WORDS, k=10)),
+                )
+                for _ in range(options['comments'])
+            ), fetch_pks=False)
+        Title.objects.rebuild_rating()
+        search.rebuild_index()
+        ranking.rebuild()
+        stats.rebuild()
+        sizes = {
+            'titles': len(titles),
+            'reviews': len(reviews),
+            'comments': options['comments'] if reviews else 0,
+            'users': len(users),
+            'generate_seconds': round(time.monotonic() - started, 2),
+        }
+        self.stderr.write(f'Данные созданы за {sizes["generate_seconds"]} с.')
+        return {'sizes': sizes, 'users': users, 'titles': titles,
+                'reviews': reviews}
+
+    def endpoints(self, dataset):
+        """Пары (имя, функция запроса) для основных эндпоинтов."""
+        title_id = dataset['titles'][0]
+        reviews = Review.objects.filter(title_id=title_id).values_list(
+            'pk', flat=True)
+        review_id = reviews.first()
+        # Автор, у которого ещё нет отзывов: каждый POST — новое произведение.
+        author = User.objects.create(username='bench_author',
+                                     email='bench_author@yamdb.fake')
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {issue_token(author)}')
+        titles = iter(dataset['titles'])
+
+        def get(url):
+            return lambda: client.get(url)
+
+        def post_review():
+            return client.post(f'/api/v1/titles/{next(titles)}/reviews/',
+                               {'text': 'bench', 'score': 7})
+
+        endpoints = [
+            ('title-list', get('/api/v1/titles/')),
+            ('title-list-filter',
+             get('/api/v1/titles/?year=1984&genre=bench-1')),
+            ('title-list-search', get('/api/v1/titles/?search=огонь')),
+            ('title-detail', get(f'/api/v1/titles/{title_id}/')),
+            ('title-top', get('/api/v1/titles/top/?genre=bench-1')),
+            ('genre-list', get('/api/v1/genres/')),
+            ('category-list', get('/api/v1/categories/')),
+            ('review-list', get(f'/api/v1/titles/{title_id}/reviews/')),
+            ('review-list-cursor', get(
+                f'/api/v1/titles/{title_id}/reviews/?pagination=cursor')),
+        ]
+        if review_id is not None:
+            endpoints.append(('comment-list', get(
+                f'/api/v1/titles/{title_id}/reviews/{review_id}/comments/')))
+        # Прогрев, замеры и проход с tracemalloc берут разные произведения.
+        if len(dataset['titles']) > self.requests + 2:
+            endpoints.append(('review-create', post_review))
+        return endpoints
+
+    def run(self, dataset, requests):
+        self.requests = requests
+        results = {}
+        for name, request in self.endpoints(dataset):
+            request()
+            timings, queries, statuses = [], [], set()
+            for _ in range(requests):
+                with CaptureQueriesContext(connection) as context:
+                    started = time.perf_counter()
+                    response = request()
+                    timings.append((time.perf_counter() - started) * 1000)
+                queries.append(len(context.captured_queries))
+                statuses.add(response.status_code)
+            # tracemalloc замедляет код, поэтому память меряется отдельно.
+            tracemalloc.start()
+            request()
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            results[name] = {
+                'requests': len(timings),
+                'status': sorted(statuses),
+                'p50_ms': round(percentile(timings, 50), 3),
+                'p95_ms': round(percentile(timings, 95), 3),
+                'max_ms': round(max(timings), 3),
+                'queries': max(queries),
+                'queries_median': statistics.median(queries),
+                'peak_memory_kb': round(peak / 1024, 1),
+            }
+            self.stderr.write(
+                f'{name:<20} p50 {results[name]["p50_ms"]:8.2f} мс  '
+                f'p95 {results[name]["p95_ms"]:8.2f} мс  '
+                f'запросов {results[name]["queries"]}')
+        return results
+
+    def compare(self, endpoints, path, tolerance):
+        with open(path, encoding='utf-8') as file:
+            baseline = json.load(file)['endpoints']
+        regressions = []
+        for name, result in endpoints.items():
+            before = baseline.get(name)
+            if before is None:
+                continue
+            if result['queries'] > before['queries']:
+                regressions.append(
+                    f'{name}: запросов {before["queries"]} -> '
+                    f'{result["queries"]}')
+            if result['p95_ms'] > before['p95_ms'] * (1 + tolerance):
+                regressions.append(
+                    f'{name}: p95 {before["p95_ms"]} -> '
+                    f'{result["p95_ms"]} мс')
+        if regressions:
+            raise CommandError('Регрессии производительности:\n'
+                               + '\n'.join(regressions))
@@ -0,0 +1,59 @@
+import random
+import statistics
+import time
+
+from api.management.synthetic import create_categories, create_titles
+from api.v1.filters import TitleFilter
+from django.conf import settings
+from django.core.management import BaseCommand, CommandError
+from django.db import transaction
+from reviews.models import Title
+
+FILTERS = {
+    'year': {'year': 1984},
+    'category': {'category': 'bench-3'},
+    'name': {'name': 'огонь'},
+    'year+name': {'year': 1984, 'name': 'night'},
+}
+
+
+class Command(BaseCommand):
+    help = ('Замеряет время фильтров TitleFilter на синтетическом каталоге. '
+            'Данные создаются в транзакции и откатываются.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--titles', type=int, default=1_000_000)
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument('--explain', action='store_true')
+
+    def handle(self, *args, **kwargs):
+        if kwargs['titles'] < 1 or kwargs['repeat'] < 1:
+            raise CommandError('--titles и --repeat должны быть больше нуля.')
+        with transaction.atomic():
+            self.generate(kwargs['titles'])
+            for label, data in FILTERS.items():
+                self.measure(label, data, kwargs['repeat'],
+                             kwargs['explain'])
+            transaction.set_rollback(True)
+
+    def generate(self, count):
+        started = time.monotonic()
+        random.seed(count)
+        create_titles(count, create_categories())
+        self.stdout.write(
+            f'Создано {count} произведений за '
+            f'{time.monotonic() - started:.1f} с.')
+
+    def measure(self, label, data, repeat, explain):
+        queryset = TitleFilter(data, Title.objects.all()).qs
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            queryset.count()
+            list(queryset[:settings.REST_FRAMEWORK['PAGE_SIZE']])
+            timings.append((time.perf_counter() - started) * 1000)
+        self.stdout.write(
+            f'{label:<10} median {statistics.median(timings):8.2f} мс  '
+            f'max {max(timings):8.2f} мс')
+        if explain:
+            self.stdout.write(queryset.explain())
@@ -1,7 +1,16 @@
 import csv
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from itertools import islice
 
+from api.cache import bump_version
 from django.conf import settings
-from django.core.management import BaseCommand
+from django.core.management import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import connection, connections, transaction
+from reviews import ranking, search, stats
 from reviews.models import Category, Comment, Genre, Review, Title, User
 
 TABLES = {
@@ -9,22 +18,191 @@ TABLES = {
     Category: 'category.csv',
     Genre: 'genre.csv',
     Title: 'titles.csv',
+    Title.genre.through: 'genre_title.csv',
     Review: 'review.csv',
     Comment: 'comments.csv',
 }
 
+BATCH_SIZE = 5000
+
+
+def resolve_columns(model, header):
+    """Сопоставляет колонки CSV с attname полей и связанными моделями."""
+    fields = {}
+    for field in model._meta.concrete_fields:
+        fields[field.name] = fields[field.attname] = field
+    columns = []
+    for column in header:
+        field = fields.get(column)
+        if field is None:
+            raise CommandError(
+                f'{model._meta.label}: неизвестная колонка {column}.')
+        related = field.related_model if field.is_relation else None
+        columns.append((field.attname, field.null, related))
+    return columns
+
+
+def dependency_graph(models):
+    """Для каждой таблицы — таблицы, на которые она ссылается по FK."""
+    return {
+        model: {
+            field.related_model for field in model._meta.concrete_fields
+            if field.is_relation and field.related_model in models
+            and field.related_model is not model
+        }
+        for model in models
+    }
+
+
+def rate(count, started):
+    return count / max(time.monotonic() - started, 1e-6)
+
+
+@contextmanager
+def keep_auto_now(model, attnames):
+    """Сохраняет даты из CSV вместо auto_now_add на время загрузки."""
+    fields = [field for field in model._meta.concrete_fields
+              if getattr(field, 'auto_now_add', False)
+              and field.attname in attnames]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
 
 class Command(BaseCommand):
+    help = 'Потоково загружает данные из CSV-файлов пачками.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=BATCH_SIZE,
+            help='Количество строк в одном INSERT.')
+        parser.add_argument(
+            '--workers', type=int, default=1,
+            help='Количество таблиц, загружаемых одновременно.')
+        parser.add_argument(
+            '--path', default=f'{settings.BASE_DIR}/static/data',
+            help='Каталог с CSV-файлами.')
+
     def handle(self, *args, **kwargs):
-        for model, csv_f in TABLES.items():
-            with open(
-                f'{settings.BASE_DIR}/static/data/{csv_f}',
-                'r',
-                encoding='utf-8'
-            ) as csv_file:
-                reader = csv.DictReader(csv_file)
-                model.objects.bulk_create(
-                    model(**data) for data in reader
-                )
-                self.stdout.write(
-                    self.style.SUCCESS('Данные успешно загружены.'))
+        if kwargs['batch_size'] < 1:
+            raise CommandError('--batch-size должен быть больше нуля.')
+        workers = kwargs['workers']
+        if workers < 1:
+            raise CommandError('--workers должен быть больше нуля.')
+        if workers > 1 and connection.vendor == 'sqlite':
+            self.stdout.write(self.style.WARNING(
+                'SQLite не поддерживает параллельную запись, '
+                'таблицы будут загружены по очереди.'))
+            workers = 1
+        self.batch_size = kwargs['batch_size']
+        self.path = kwargs['path']
+        self.known_ids = {}
+        self.known_ids_lock = threading.Lock()
+        started = time.monotonic()
+        timings = self.run_pipeline(workers)
+        with transaction.atomic():
+            Title.objects.rebuild_rating()
+            search.rebuild_index()
+            ranking.rebuild()
+            stats.rebuild()
+        for model in (Title, Genre, Category):
+            bump_version(model)
+        for model, elapsed in timings.items():
+            self.stdout.write(f'{model._meta.label}: {elapsed:.2f} с.')
+        self.stdout.write(self.style.SUCCESS(
+            f'Данные успешно загружены за '
+            f'{time.monotonic() - started:.2f} с.'))
+
+    def run_pipeline(self, workers):
+        """Запускает таблицу, как только загружены все её родители."""
+        pending = dependency_graph(TABLES)
+        done, timings, running = set(), {}, {}
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            while pending or running:
+                for model in [model for model, parents in pending.items()
+                              if parents <= done]:
+                    del pending[model]
+                    running[executor.submit(self.run_table, model)] = model
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    model = running.pop(future)
+                    try:
+                        timings[model] = future.result()
+                    except Exception:
+                        for other in running:
+                            other.cancel()
+                        raise
+                    done.add(model)
+        return timings
+
+    def run_table(self, model):
+        try:
+            return self.load_table(model, f'{self.path}/{TABLES[model]}')
+        finally:
+            connections.close_all()
+
+    def get_known_ids(self, model):
+        with self.known_ids_lock:
+            if model not in self.known_ids:
+                self.known_ids[model] = set(
+                    model.objects.values_list('pk', flat=True).iterator())
+            return self.known_ids[model]
+
+    def load_table(self, model, path):
+        label = model._meta.label
+        started = time.monotonic()
+        loaded = skipped = 0
+        with open(path, 'r', encoding='utf-8') as csv_file:
+            reader = csv.reader(csv_file)
+            columns = resolve_columns(model, next(reader))
+            attnames = [attname for attname, _, _ in columns]
+            nullable = [null for _, null, _ in columns]
+            relations = [
+                (index, self.get_known_ids(related))
+                for index, (_, _, related) in enumerate(columns) if related
+            ]
+            own_ids = self.get_known_ids(model)
+            pk_index = attnames.index(model._meta.pk.attname)
+            with keep_auto_now(model, attnames), transaction.atomic():
+                while True:
+                    rows = list(islice(reader, self.batch_size))
+                    if not rows:
+                        break
+                    batch = []
+                    for row in rows:
+                        values = [
+                            None if null and value == '' else value
+                            for value, null in zip(row, nullable)
+                        ]
+                        pk = int(values[pk_index])
+                        if pk in own_ids or any(
+                            values[index] is not None
+                            and int(values[index]) not in ids
+                            for index, ids in relations
+                        ):
+                            skipped += 1
+                            continue
+                        batch.append(model(**dict(zip(attnames, values))))
+                        own_ids.add(pk)
+                    model.objects.bulk_create(batch,
+                                              batch_size=self.batch_size)
+                    loaded += len(batch)
+                    self.stdout.write(
+                        f'{label}: {loaded} строк '
+                        f'({rate(loaded, started):.0f} строк/с)')
+                self.reset_sequence(model)
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'{label}: загружено {loaded}, пропущено {skipped} '
+            f'за {elapsed:.2f} с.'))
+        return elapsed
+
+    def reset_sequence(self, model):
+        sql = connection.ops.sequence_reset_sql(no_style(), [model])
+        with connection.cursor() as cursor:
+            for statement in sql:
+                cursor.execute(statement)
@@ -0,0 +1,19 @@
+from api.cache import bump_version
+from django.core.management import BaseCommand
+from django.db import transaction
+from reviews import ranking, stats
+from reviews.models import Title
+
+
+class Command(BaseCommand):
+    help = ('Пересчитывает сохранённый рейтинг произведений и таблицы '
+            'рейтинга и распределения оценок по отзывам.')
+
+    def handle(self, *args, **kwargs):
+        with transaction.atomic():
+            updated = Title.objects.rebuild_rating()
+            ranking.rebuild()
+            stats.rebuild()
+        bump_version(Title)
+        self.stdout.write(
+            self.style.SUCCESS(f'Рейтинг пересчитан: {updated} произведений.'))
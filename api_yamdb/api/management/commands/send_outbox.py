@@ -0,0 +1,57 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management import BaseCommand, CommandError
+from django.db import connections
+from users import outbox
+
+
+def deliver_batch(emails):
+    try:
+        return outbox.deliver(emails)
+    finally:
+        connections.close_all()
+
+
+class Command(BaseCommand):
+    help = 'Фоновая отправка писем из очереди OutgoingEmail.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=4,
+            help='Количество потоков отправки.')
+        parser.add_argument(
+            '--batch-size', type=int, default=50,
+            help='Писем на одно соединение с почтовым сервером.')
+        parser.add_argument(
+            '--interval', type=float, default=1.0,
+            help='Пауза в секундах, когда очередь пуста.')
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Разобрать очередь один раз и выйти.')
+        parser.add_argument(
+            '--depth', action='store_true',
+            help='Показать длину очереди и выйти.')
+
+    def handle(self, *args, **kwargs):
+        if kwargs['depth']:
+            self.stdout.write(str(outbox.queue_depth()))
+            return
+        workers, batch_size = kwargs['workers'], kwargs['batch_size']
+        if workers < 1 or batch_size < 1:
+            raise CommandError(
+                '--workers и --batch-size должны быть больше нуля.')
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            while True:
+                emails = outbox.claim(limit=workers * batch_size)
+                if emails:
+                    batches = [emails[start:start + batch_size]
+                               for start in range(0, len(emails), batch_size)]
+                    sent = sum(executor.map(deliver_batch, batches))
+                    self.stdout.write(
+                        f'Отправлено {sent} из {len(emails)}, '
+                        f'в очереди {outbox.queue_depth()}.')
+                    continue
+                if kwargs['once']:
+                    break
+                time.sleep(kwargs['interval'])
@@ -0,0 +1,51 @@
+"""Синтетический каталог для нагрузочных команд bench_*."""
+import random
+
+from reviews.models import Category, Title
+
+BATCH_SIZE = 5000
+WORDS = ('звезда', 'ночь', 'город', 'дорога', 'море', 'тень', 'огонь',
+         'Star', 'Night', 'City', 'Road', 'Sea', 'Shadow', 'Fire')
+
+
+def created_pks(model, last_pk):
+    return list(model.objects.filter(pk__gt=last_pk).order_by('pk')
+                .values_list('pk', flat=True))
+
+
+def last_pk(model):
+    return model.objects.order_by('-pk').values_list(
+        'pk', flat=True).first() or 0
+
+
+def bulk_create(model, objects, fetch_pks=True):
+    """bulk_create генератора пачками по BATCH_SIZE, вернёт новые pk."""
+    start = last_pk(model)
+    batch = []
+    for obj in objects:
+        batch.append(obj)
+        if len(batch) == BATCH_SIZE:
+            model.objects.bulk_create(batch)
+            batch = []
+    model.objects.bulk_create(batch)
+    return created_pks(model, start) if fetch_pks else None
+
+
+def create_categories(count=10):
+    return bulk_create(Category, (
+        Category(name=f'Категория {idx}', slug=f'bench-{idx}')
+        for idx in range(count)
+    ))
+
+
+def create_titles(count, categories):
+    """Произведения со случайными названиями из WORDS, вернёт их pk."""
+    return bulk_create(Title, (
+        Title(
+            name=' '.join(random.sample(WORDS, 3)) + f' {idx}',
+            year=random.randint(1900, 2020),
+            description=' '.join(random.choices(WORDS, k=12)),
+            category_id=random.choice(categories),
+        )
+        for idx in range(count)
+    ))
@@ -0,0 +1,99 @@
+"""Гистограммы стоимости запросов в памяти процесса.
+
+Значения копятся в каждом воркере отдельно и сбрасываются при его
+перезапуске; сборщик Prometheus суммирует их по инстансам сам.
+"""
+import bisect
+import threading
+
+SECONDS_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+                   1, 2.5, 5, 10)
+QUERIES_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 200)
+
+METRICS = {
+    'api_request_duration_seconds': (
+        'Полное время обработки запроса.', SECONDS_BUCKETS),
+    'api_request_db_seconds': (
+        'Время выполнения SQL-запросов.', SECONDS_BUCKETS),
+    'api_request_render_seconds': (
+        'Время сериализации ответа рендерером.', SECONDS_BUCKETS),
+    'api_request_queries': (
+        'Число SQL-запросов за запрос.', QUERIES_BUCKETS),
+}
+
+_histograms = {}
+_lock = threading.Lock()
+
+
+class Histogram:
+    __slots__ = ('buckets', 'counts', 'count', 'sum')
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0
+
+    def observe(self, value):
+        index = bisect.bisect_left(self.buckets, value)
+        if index < len(self.counts):
+            self.counts[index] += 1
+        self.count += 1
+        self.sum += value
+
+
+def observe(route, **values):
+    """Добавляет замеры одного запроса: observe(route, метрика=значение)."""
+    with _lock:
+        for name, value in values.items():
+            key = (name, route)
+            histogram = _histograms.get(key)
+            if histogram is None:
+                histogram = _histograms[key] = Histogram(METRICS[name][1])
+            histogram.observe(value)
+
+
+def reset():
+    with _lock:
+        _histograms.clear()
+
+
+def _escape(value):
+    return (str(value).replace('\\', r'\\').replace('"', r'\"')
+            .replace('\n', r'\n'))
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def render(extra=()):
+    """Текстовый формат Prometheus 0.0.4.
+
+    extra — дополнительные метрики (имя, тип, описание, значение).
+    """
+    with _lock:
+        snapshot = {key: (list(h.counts), h.count, h.sum)
+                    for key, h in _histograms.items()}
+    lines = []
+    for name, (description, buckets) in METRICS.items():
+        lines.append(f'# HELP {name} {description}')
+        lines.append(f'# TYPE {name} histogram')
+        for (metric, route), (counts, count, total) in sorted(
+                snapshot.items()):
+            if metric != name:
+                continue
+            label = f'route="{_escape(route)}"'
+            cumulative = 0
+            for bound, bucket_count in zip(buckets, counts):
+                cumulative += bucket_count
+                lines.append(f'{name}_bucket{{{label},le="{_number(bound)}"}}'
+                             f' {cumulative}')
+            lines.append(f'{name}_bucket{{{label},le="+Inf"}} {count}')
+            lines.append(f'{name}_sum{{{label}}} {_number(total)}')
+            lines.append(f'{name}_count{{{label}}} {count}')
+    for name, kind, description, value in extra:
+        lines.append(f'# HELP {name} {description}')
+        lines.append(f'# TYPE {name} {kind}')
+        lines.append(f'{name} {_number(value)}')
+    return '\n'.join(lines) + '\n'
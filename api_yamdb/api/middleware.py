@@ -0,0 +1,63 @@
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+from . import metrics
+
+
+class QueryCounter:
+    """execute_wrapper, считающий SQL-запросы и время их выполнения."""
+
+    def __init__(self):
+        self.queries = 0
+        self.seconds = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.seconds += time.perf_counter() - start
+            self.queries += 1
+
+
+class ProfilingMiddleware:
+    """Замеряет запросы к БД, рендеринг и полное время по имени маршрута.
+
+    Включается настройкой PROFILING_ENABLED, результаты отдаёт /_metrics.
+    """
+
+    def __init__(self, get_response):
+        if not settings.PROFILING_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        counter = QueryCounter()
+        request._render_seconds = 0
+        start = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(counter))
+            response = self.get_response(request)
+        match = request.resolver_match
+        metrics.observe(
+            match.view_name if match else 'unresolved',
+            api_request_duration_seconds=time.perf_counter() - start,
+            api_request_db_seconds=counter.seconds,
+            api_request_render_seconds=request._render_seconds,
+            api_request_queries=counter.queries,
+        )
+        return response
+
+    def process_template_response(self, request, response):
+        start = time.perf_counter()
+
+        def stop(response):
+            request._render_seconds = time.perf_counter() - start
+
+        response.add_post_render_callback(stop)
+        return response
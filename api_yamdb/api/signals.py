@@ -0,0 +1,83 @@
+from django.db import transaction
+from django.db.backends.signals import connection_created
+from django.db.models.signals import (m2m_changed, post_delete, post_save,
+                                      pre_save)
+from django.dispatch import receiver
+from reviews.models import Category, Genre, Review, Title
+from users.models import User
+
+from . import db
+from .cache import (bump_version, forget_parent, forget_titles,
+                    forget_token_version)
+
+TOKEN_CLAIM_FIELDS = ('username', 'role', 'is_superuser', 'is_active')
+
+
+@receiver(post_save, sender=Genre)
+@receiver(post_delete, sender=Genre)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_catalog_cache(sender, **kwargs):
+    transaction.on_commit(lambda: bump_version(sender))
+
+
+@receiver(post_delete, sender=Title)
+@receiver(post_delete, sender=Review)
+def invalidate_parent_cache(sender, instance, **kwargs):
+    pk = instance.pk
+    transaction.on_commit(lambda: forget_parent(sender, pk))
+
+
+@receiver(post_save, sender=Title)
+@receiver(post_delete, sender=Title)
+def invalidate_title_snapshot(sender, instance, **kwargs):
+    pks = [instance.pk]
+    transaction.on_commit(lambda: forget_titles(pks))
+
+
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+def invalidate_reviewed_title(sender, instance, **kwargs):
+    """Отзыв меняет рейтинг, который выводит снимок произведения."""
+    pks = [instance.title_id]
+    transaction.on_commit(lambda: forget_titles(pks))
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+def invalidate_title_genres(sender, instance, action, reverse, pk_set,
+                            **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        pks = [instance.pk]
+    elif action == 'post_clear':
+        # Какие произведения потеряли жанр, уже не узнать.
+        transaction.on_commit(lambda: bump_version(Title))
+        return
+    else:
+        pks = list(pk_set)
+    transaction.on_commit(lambda: forget_titles(pks))
+
+
+@receiver(pre_save, sender=User)
+def revoke_stale_tokens(sender, instance, **kwargs):
+    """Смена роли или блокировка делает выданные токены недействительными."""
+    if instance.pk is None or instance.get_deferred_fields():
+        return
+    old = sender.objects.filter(pk=instance.pk).values(
+        *TOKEN_CLAIM_FIELDS).first()
+    if old is not None and any(old[field] != getattr(instance, field)
+                               for field in TOKEN_CLAIM_FIELDS):
+        instance.token_version += 1
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_token_version(sender, instance, **kwargs):
+    pk = instance.pk
+    transaction.on_commit(lambda: forget_token_version(pk))
+
+
+@receiver(connection_created)
+def configure_connection(sender, connection, **kwargs):
+    db.configure_connection(connection)
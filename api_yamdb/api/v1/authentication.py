@@ -0,0 +1,68 @@
+from functools import lru_cache
+
+from api.cache import get_token_version
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import (AuthenticationFailed,
+                                                 InvalidToken, TokenError)
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken
+from rest_framework_simplejwt.utils import aware_utcnow
+from users.models import User
+
+USER_CLAIMS = ('username', 'role', 'is_superuser', 'is_active')
+VERSION_CLAIM = 'ver'
+
+
+def issue_token(user):
+    """Access-токен с ролью и версией, достаточными для проверки прав."""
+    token = AccessToken.for_user(user)
+    for claim in USER_CLAIMS:
+        token[claim] = getattr(user, claim)
+    token[VERSION_CLAIM] = user.token_version
+    return token
+
+
+@lru_cache(maxsize=settings.JWT_CACHE_SIZE)
+def decode_token(raw_token):
+    return AccessToken(raw_token)
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """JWT-аутентификация без чтения строки пользователя из БД.
+
+    Пользователь собирается из claims токена; отозванные токены
+    отсекаются сравнением версии с User.token_version через кэш.
+    Токены без claims обрабатываются как в JWTAuthentication.
+    """
+
+    def get_validated_token(self, raw_token):
+        try:
+            token = decode_token(raw_token)
+            token.check_exp(current_time=aware_utcnow())
+        except TokenError as error:
+            raise InvalidToken({
+                'detail': 'Given token not valid for any token type',
+                'messages': [{'token_class': AccessToken.__name__,
+                              'token_type': AccessToken.token_type,
+                              'message': error.args[0]}],
+            })
+        return token
+
+    def get_user(self, validated_token):
+        if any(claim not in validated_token
+               for claim in (*USER_CLAIMS, VERSION_CLAIM)):
+            return super().get_user(validated_token)
+        user_id = validated_token[api_settings.USER_ID_CLAIM]
+        if get_token_version(user_id) != validated_token[VERSION_CLAIM]:
+            raise AuthenticationFailed('Токен отозван.', code='token_revoked')
+        if not validated_token['is_active']:
+            raise AuthenticationFailed('User is inactive',
+                                       code='user_inactive')
+        return User.from_db(
+            DEFAULT_DB_ALIAS,
+            ('id', *USER_CLAIMS, 'token_version'),
+            (user_id, *(validated_token[claim] for claim in USER_CLAIMS),
+             validated_token[VERSION_CLAIM]),
+        )
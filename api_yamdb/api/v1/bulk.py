@@ -0,0 +1,79 @@
+"""Пакетная запись каталога: одна транзакция и bulk-запросы на пачку."""
+from api.cache import bump_version, forget_titles
+from django.db import connection, transaction
+from django.utils import timezone
+from reviews import ranking, search
+from reviews.fields import normalize
+from reviews.models import Category, Genre, Title
+
+TITLE_FIELDS = ('name', 'name_search', 'year', 'description', 'category',
+                'updated_at')
+# Поле Title, через которое произведения выводят жанр или категорию.
+TITLE_RELATIONS = {Genre: 'genre', Category: 'category'}
+
+
+def upsert_by_slug(model, items):
+    """Создаёт новые объекты и обновляет name у существующих по slug."""
+    existing = model.objects.in_bulk(
+        [item['slug'] for item in items], field_name='slug')
+    created, updated, renamed = [], [], []
+    now = timezone.now()
+    for item in items:
+        obj = existing.get(item['slug'])
+        if obj is None:
+            created.append(model(**item))
+            continue
+        if obj.name != item['name']:
+            renamed.append(obj.pk)
+        obj.name = item['name']
+        obj.updated_at = now
+        updated.append(obj)
+    model.objects.bulk_create(created)
+    model.objects.bulk_update(updated, ['name', 'updated_at'])
+    Title.objects.filter(
+        **{f'{TITLE_RELATIONS[model]}__in': renamed}).touch()
+    transaction.on_commit(lambda: bump_version(model))
+    return {'created': len(created), 'updated': len(updated)}
+
+
+def upsert_titles(items):
+    """Обновляет произведения с id, создаёт остальные, пишет жанры пачкой."""
+    existing = Title.objects.in_bulk(
+        [item['id'] for item in items if item.get('id')])
+    created, updated, genres = [], [], []
+    now = timezone.now()
+    for item in items:
+        item = dict(item)
+        title_genres = item.pop('genre')
+        title = existing.get(item.pop('id', None))
+        if title is None:
+            title = Title(**item)
+            created.append(title)
+        else:
+            for field, value in item.items():
+                setattr(title, field, value)
+            title.name_search = normalize(title.name)
+            title.updated_at = now
+            updated.append(title)
+        genres.append((title, title_genres))
+    if connection.features.can_return_rows_from_bulk_insert:
+        Title.objects.bulk_create(created)
+    else:
+        for title in created:
+            title.save()
+    Title.objects.bulk_update(updated, TITLE_FIELDS)
+
+    through = Title.genre.through
+    through.objects.filter(
+        title_id__in=[title.pk for title in updated]).delete()
+    through.objects.bulk_create(
+        through(title_id=title.pk, genre_id=genre.pk)
+        for title, title_genres in genres
+        for genre in {genre.pk: genre for genre in title_genres}.values()
+    )
+    for title in updated:
+        search.index_title(title)
+    ranking.rebuild_titles(title.pk for title in updated)
+    pks = [title.pk for title in updated]
+    transaction.on_commit(lambda: forget_titles(pks))
+    return {'created': len(created), 'updated': len(updated)}
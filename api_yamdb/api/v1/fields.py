@@ -0,0 +1,70 @@
+from rest_framework import serializers
+from rest_framework.relations import MANY_RELATION_KWARGS
+
+SLUG_CACHE = '_slug_cache'
+
+
+class BatchManyRelatedField(serializers.ManyRelatedField):
+
+    def to_internal_value(self, data):
+        if isinstance(data, (list, tuple)):
+            self.child_relation.resolve(data)
+        return super().to_internal_value(data)
+
+
+class BatchSlugRelatedField(serializers.SlugRelatedField):
+    """SlugRelatedField, который ищет все slug одним запросом.
+
+    Найденные объекты кэшируются в контексте сериализатора, то есть
+    на время одного запроса и общие для всех элементов many-режима.
+    """
+
+    @classmethod
+    def many_init(cls, *args, **kwargs):
+        list_kwargs = {'child_relation': cls(*args, **kwargs)}
+        for key in kwargs:
+            if key in MANY_RELATION_KWARGS:
+                list_kwargs[key] = kwargs[key]
+        return BatchManyRelatedField(**list_kwargs)
+
+    def get_slug_cache(self):
+        queryset = self.get_queryset()
+        key = (queryset.model._meta.label, self.slug_field)
+        return self.context.setdefault(SLUG_CACHE, {}).setdefault(key, {})
+
+    def resolve(self, slugs):
+        cache = self.get_slug_cache()
+        missing = {slug for slug in slugs
+                   if isinstance(slug, str) and slug not in cache}
+        if missing:
+            cache.update(self.get_queryset().in_bulk(
+                missing, field_name=self.slug_field))
+        return cache
+
+    def to_internal_value(self, data):
+        if not isinstance(data, str):
+            self.fail('invalid')
+        instance = self.resolve([data]).get(data)
+        if instance is None:
+            self.fail('does_not_exist', slug_name=self.slug_field,
+                      value=data)
+        return instance
+
+
+def preload_slugs(serializer, items):
+    """Разрешает slug всех элементов пачки до их поштучной проверки."""
+    for name, field in serializer.fields.items():
+        many = isinstance(field, serializers.ManyRelatedField)
+        relation = field.child_relation if many else field
+        if field.read_only or not isinstance(relation, BatchSlugRelatedField):
+            continue
+        slugs = []
+        for item in items:
+            if not isinstance(item, dict):
+                continue
+            value = item.get(name)
+            if many and isinstance(value, (list, tuple)):
+                slugs.extend(value)
+            elif not many:
+                slugs.append(value)
+        relation.resolve(slugs)
@@ -1,14 +1,31 @@
 import django_filters
+from rest_framework.filters import BaseFilterBackend
+from reviews.fields import normalize
 from reviews.models import Title
+from reviews.search import search_titles
 
 
 class TitleFilter(django_filters.FilterSet):
     category = django_filters.CharFilter(field_name='category__slug')
     genre = django_filters.CharFilter(field_name='genre__slug')
-    name = django_filters.CharFilter(
-        field_name='name', lookup_expr='icontains')
+    name = django_filters.CharFilter(method='filter_name')
     year = django_filters.NumberFilter(field_name='year')
 
     class Meta:
         model = Title
         fields = ('category', 'genre', 'name', 'year')
+
+    def filter_name(self, queryset, name, value):
+        return queryset.filter(name_search__contains=normalize(value))
+
+
+class TitleSearchFilter(BaseFilterBackend):
+    """Полнотекстовый поиск по ?search=, отсортированный по релевантности."""
+
+    search_param = 'search'
+
+    def filter_queryset(self, request, queryset, view):
+        text = request.query_params.get(self.search_param, '').strip()
+        if not text:
+            return queryset
+        return search_titles(queryset, text)
@@ -1,4 +1,275 @@
-from rest_framework import mixins, viewsets
+import copy
+from hashlib import md5
+
+from api import cache
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
+from django.db import transaction
+from django.db.models import Prefetch
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from rest_framework import mixins, permissions, serializers, status, viewsets
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.parsers import JSONParser
+from rest_framework.response import Response
+
+from .parsers import NDJSONParser
+
+
+def related_sources(field, model):
+    """Поля связанной модели, которые выводит поле-связь."""
+    if isinstance(field, serializers.ListSerializer):
+        field = field.child
+    if isinstance(field, serializers.ManyRelatedField):
+        field = field.child_relation
+    if isinstance(field, serializers.BaseSerializer):
+        sources = [child.source for child in field.fields.values()
+                   if not child.write_only]
+    elif isinstance(field, serializers.SlugRelatedField):
+        sources = [field.slug_field]
+    else:
+        return []
+    names = {model_field.name for model_field in model._meta.concrete_fields}
+    if not set(sources) <= names:
+        return []
+    return sources
+
+
+def model_field_for(opts, field):
+    """Поле модели, которое выводит поле сериализатора, или None."""
+    if '.' in field.source or field.source == '*':
+        return None
+    try:
+        return opts.get_field(field.source)
+    except FieldDoesNotExist:
+        return None
+
+
+def optimize_queryset(queryset, serializer, only=False, extra_fields=()):
+    """Подбирает select_related/prefetch_related по полям сериализатора.
+
+    С only=True дополнительно загружает только выводимые колонки
+    и extra_fields; годится для чтения, но не для объектов, которые
+    будут сохраняться.
+    """
+    opts = queryset.model._meta
+    select, prefetch, loaded = [], [], [opts.pk.name, *extra_fields]
+    for field in serializer.fields.values():
+        if field.write_only:
+            continue
+        model_field = model_field_for(opts, field)
+        if model_field is None:
+            only = False
+            continue
+        if not model_field.is_relation or not isinstance(
+                field, (serializers.BaseSerializer, serializers.RelatedField,
+                        serializers.ManyRelatedField)):
+            loaded.append(field.source)
+            continue
+        sources = related_sources(field, model_field.related_model)
+        if model_field.many_to_many or model_field.one_to_many:
+            prefetch.append(Prefetch(
+                field.source,
+                model_field.related_model.objects.only(*sources)
+                if only and sources else None))
+        else:
+            select.append(field.source)
+            loaded.append(field.source)
+            loaded.extend(f'{field.source}__{source}' for source in sources)
+    if select:
+        queryset = queryset.select_related(*select)
+    if prefetch:
+        queryset = queryset.prefetch_related(*prefetch)
+    if only:
+        queryset = queryset.only(*loaded)
+    return queryset
+
+
+class OptimizedQuerysetMixin:
+    """Строит выборку под сериализатор текущего действия.
+
+    При чтении загружаются только колонки, которые попадут в ответ,
+    и extra_fields, нужные самому представлению.
+    """
+
+    extra_fields = ()
+
+    def optimize(self, queryset):
+        return optimize_queryset(
+            queryset, self.get_serializer(),
+            only=self.request.method in permissions.SAFE_METHODS,
+            extra_fields=self.extra_fields)
+
+    def get_queryset(self):
+        return self.optimize(super().get_queryset())
+
+
+class SparseFieldsMixin:
+    """Поля ответа по ?fields= и раскрытие связей по ?expand=.
+
+    ?fields=id,name оставляет перечисленные поля. Связи из
+    collapsed_fields без ?expand выводятся вложенными объектами,
+    а при заданном ?expand — только те, что в нём перечислены;
+    остальные заменяются полем из collapsed_fields (обычно slug).
+    Параметры действуют только на чтение и только в корневом
+    сериализаторе.
+    """
+
+    collapsed_fields = {}
+
+    def is_root(self):
+        parent = self.parent
+        if isinstance(parent, serializers.ListSerializer):
+            parent = parent.parent
+        return parent is None
+
+    def get_fields(self):
+        fields = super().get_fields()
+        request = self.context.get('request')
+        if (request is None or not self.is_root()
+                or request.method not in permissions.SAFE_METHODS):
+            return fields
+        params = request.query_params
+        if 'fields' in params:
+            wanted = self.parse_names(params['fields'], fields, 'fields')
+            fields = {name: field for name, field in fields.items()
+                      if name in wanted}
+        if 'expand' in params:
+            expand = self.parse_names(params['expand'],
+                                      self.collapsed_fields, 'expand')
+            for name, collapsed in self.collapsed_fields.items():
+                if name in fields and name not in expand:
+                    fields[name] = copy.deepcopy(collapsed)
+        return fields
+
+    @staticmethod
+    def parse_names(value, allowed, param):
+        names = {name.strip() for name in value.split(',') if name.strip()}
+        unknown = names - set(allowed)
+        if unknown:
+            raise ValidationError({param: (
+                f'Неизвестные поля: {", ".join(sorted(unknown))}. '
+                f'Допустимые: {", ".join(allowed) or "нет"}.')})
+        return names
+
+
+def not_modified(request, etag, last_modified=None):
+    """Ответ 304, если клиент прислал актуальные ETag/дату, иначе None."""
+    response = get_conditional_response(
+        request, etag=etag,
+        last_modified=last_modified and int(last_modified.timestamp()))
+    if response is not None:
+        set_validators(response, etag, last_modified)
+    return response
+
+
+def set_validators(response, etag, last_modified=None):
+    if etag:
+        response['ETag'] = etag
+    if last_modified:
+        response['Last-Modified'] = http_date(last_modified.timestamp())
+    return response
+
+
+class ConditionalListMixin:
+    """ETag для списка; 304 отдаётся до сериализации.
+
+    ETag считается по (pk, updated_at) строк страницы, обёртке пагинатора
+    (count, ссылки) и адресу запроса — без дополнительных запросов к БД.
+    Связанные данные, выводимые в ответе, должны обновлять updated_at
+    объекта сами (см. reviews.signals).
+    """
+
+    extra_fields = ('updated_at',)
+
+    def make_etag(self, state):
+        request = self.request
+        key = repr((request.get_full_path(), request.accepted_media_type,
+                    state))
+        return quote_etag(md5(key.encode()).hexdigest())
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+        rows = queryset if page is None else page
+        state = [(obj.pk, obj.updated_at) for obj in rows]
+        if page is not None:
+            state.append(dict(self.get_paginated_response([]).data))
+        etag = self.make_etag(state)
+        response = not_modified(request, etag)
+        if response is not None:
+            return response
+        serializer = self.get_serializer(rows, many=True)
+        if page is not None:
+            response = self.get_paginated_response(serializer.data)
+        else:
+            response = Response(serializer.data)
+        return set_validators(response, etag)
+
+
+class ConditionalGetMixin(ConditionalListMixin):
+    """ETag и Last-Modified ещё и для отдельного объекта."""
+
+    def retrieve(self, request, *args, **kwargs):
+        instance = self.get_object()
+        etag = self.make_etag((instance.pk, instance.updated_at))
+        response = not_modified(request, etag, instance.updated_at)
+        if response is not None:
+            return response
+        serializer = self.get_serializer(instance)
+        return set_validators(Response(serializer.data), etag,
+                              instance.updated_at)
+
+
+class CachedListMixin:
+    """Отдаёт список из кэша, версия которого сбрасывается сигналами.
+
+    Вместе с ответом кэшируется его ETag, так что 304 на попадании
+    в кэш обходится без БД.
+    """
+
+    def list(self, request, *args, **kwargs):
+        model = self.get_queryset().model
+        key = cache.response_key(model, request)
+        cached = cache.get_cache().get(key)
+        if cached is not None:
+            cache.record('hit')
+            data, etag = cached
+            response = etag and not_modified(request, etag)
+            if response is None:
+                response = set_validators(Response(data), etag)
+            response['X-Cache'] = 'HIT'
+            return response
+        cache.record('miss')
+        response = super().list(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            cache.get_cache().set(key, (response.data, response.get('ETag')),
+                                  settings.CATALOG_CACHE_TIMEOUT)
+        response['X-Cache'] = 'MISS'
+        return response
+
+
+class BulkUpsertMixin:
+    """POST .../_bulk/ принимает массив JSON или NDJSON и пишет его пачкой."""
+
+    bulk_serializer_class = None
+
+    @action(detail=False, methods=['post'], url_path='_bulk',
+            parser_classes=(JSONParser, NDJSONParser))
+    def bulk(self, request):
+        if not isinstance(request.data, list):
+            raise ValidationError('Ожидается массив объектов.')
+        if len(request.data) > settings.BULK_MAX_ITEMS:
+            raise ValidationError(
+                f'Не больше {settings.BULK_MAX_ITEMS} объектов за запрос.')
+        serializer = self.bulk_serializer_class(
+            data=request.data, many=True,
+            context=self.get_serializer_context())
+        serializer.is_valid(raise_exception=True)
+        with transaction.atomic():
+            result = serializer.save()
+        return Response(result, status=status.HTTP_200_OK)
 
 
 class ListCreateDestroyViewSet(
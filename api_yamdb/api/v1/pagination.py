@@ -0,0 +1,96 @@
+from base64 import b64decode, b64encode
+from binascii import Error as BinasciiError
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """Постраничный вывод по ключу (pub_date, id) без COUNT и OFFSET."""
+
+    page_size = PageNumberPagination.page_size
+    cursor_query_param = 'cursor'
+    ordering = ('pub_date', 'id')
+    invalid_cursor_message = 'Неверный курсор.'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        queryset = queryset.order_by(*self.ordering)
+        position = self.decode_cursor(request)
+        if position is not None:
+            queryset = self.after(queryset, *position)
+        page = list(queryset[:self.page_size + 1])
+        self.has_next = len(page) > self.page_size
+        self.page = page[:self.page_size]
+        return self.page
+
+    def after(self, queryset, value, pk):
+        """Строки строго после позиции (value, pk) в порядке ordering.
+
+        Избыточная граница field >= value даёт индексу (…, field, id)
+        диапазон: без неё OR читает все строки родителя с начала.
+        """
+        field, tiebreaker = self.ordering
+        return queryset.filter(**{f'{field}__gte': value}).filter(
+            Q(**{f'{field}__gt': value}) | Q(**{f'{tiebreaker}__gt': pk}))
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'results': data,
+        })
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        field, tiebreaker = self.ordering
+        last = self.page[-1]
+        value = getattr(last, field)
+        if hasattr(value, 'isoformat'):
+            value = value.isoformat()
+        return replace_query_param(
+            self.request.build_absolute_uri(),
+            self.cursor_query_param,
+            self.encode_cursor(value, getattr(last, tiebreaker)),
+        )
+
+    def encode_cursor(self, value, pk):
+        return b64encode(f'{value}|{pk}'.encode()).decode()
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            value, pk = b64decode(encoded.encode()).decode().rsplit('|', 1)
+            value, pk = parse_datetime(value), int(pk)
+        except (BinasciiError, UnicodeDecodeError, TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        if value is None:
+            raise NotFound(self.invalid_cursor_message)
+        return value, pk
+
+
+class FeedPagination(PageNumberPagination):
+    """Номера страниц по умолчанию, курсор — по ?pagination=cursor."""
+
+    mode_query_param = 'pagination'
+    cursor_mode = 'cursor'
+    cursor_class = KeysetPagination
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.cursor_paginator = None
+        if request.query_params.get(self.mode_query_param) == self.cursor_mode:
+            self.cursor_paginator = self.cursor_class()
+            return self.cursor_paginator.paginate_queryset(
+                queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.cursor_paginator is not None:
+            return self.cursor_paginator.get_paginated_response(data)
+        return super().get_paginated_response(data)
@@ -17,7 +17,7 @@ class IsAdmin(permissions.BasePermission):
 class OnlyOwnAccount(permissions.BasePermission):
 
     def has_object_permission(self, request, view, obj):
-        return obj.author == request.user
+        return obj.author_id == request.user.id
 
 
 class IsAuthorOrAdmin(permissions.BasePermission):
@@ -26,7 +26,7 @@ class IsAuthorOrAdmin(permissions.BasePermission):
         return (request.method in permissions.SAFE_METHODS
                 or request.user.is_admin
                 or request.user.is_moderator
-                or obj.author == request.user)
+                or obj.author_id == request.user.id)
 
     def has_permission(self, request, view):
         return (request.method in permissions.SAFE_METHODS
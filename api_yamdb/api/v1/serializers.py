@@ -1,10 +1,21 @@
 from django.contrib.auth.validators import UnicodeUsernameValidator
+from django.db import IntegrityError, transaction
+from django.db.models import Q
 from rest_framework import serializers
 from rest_framework.exceptions import ValidationError
+from rest_framework.settings import api_settings
 from reviews.models import Category, Comment, Genre, Review, Title
+from reviews.validators import validate_slug
 from users.models import User
 
-from api_yamdb.settings import EMAIL_LEN, USER_LEN
+from api_yamdb.settings import EMAIL_LEN, RANKING_MAX_LIMIT, USER_LEN
+
+from . import bulk
+from .fields import BatchSlugRelatedField, preload_slugs
+from .mixins import SparseFieldsMixin
+
+# SQLSTATE unique_violation в PostgreSQL.
+UNIQUE_VIOLATION = '23505'
 
 
 class TokenSerializer(serializers.Serializer):
@@ -31,17 +42,37 @@ class SignUpSerializer(serializers.Serializer):
     def validate(self, data):
         if data['username'].lower() == 'me':
             raise ValidationError('Имя me недоступно.')
+        self.existing_user = self.match_user(data)
+        return data
 
-        if User.objects.filter(email=data['email'],
-                               username=data['username']).exists():
-            return data
-
-        if User.objects.filter(email=data['email']).exists():
-            raise ValidationError('Этот email уже используется.')
-
-        if User.objects.filter(username=data['username']).exists():
+    def match_user(self, data):
+        """Один запрос: пользователь с этой парой или ошибка конфликта."""
+        users = list(User.objects.filter(
+            Q(email=data['email']) | Q(username=data['username']))[:2])
+        for user in users:
+            if (user.email, user.username) == (data['email'],
+                                               data['username']):
+                return user
+        for user in users:
+            if user.email == data['email']:
+                raise ValidationError('Этот email уже используется.')
+        if users:
             raise ValidationError('Это имя уже занято.')
-        return data
+        return None
+
+    def create(self, validated_data):
+        if self.existing_user is not None:
+            return self.existing_user
+        try:
+            with transaction.atomic():
+                return User.objects.create(
+                    username=validated_data['username'],
+                    email=validated_data['email'])
+        except IntegrityError:
+            user = self.match_user(validated_data)
+            if user is None:
+                raise
+            return user
 
 
 class UserSerializer(serializers.ModelSerializer):
@@ -57,7 +88,15 @@ class UserSerializer(serializers.ModelSerializer):
         )
 
 
-class ReviewSerializer(serializers.ModelSerializer):
+def is_unique_violation(error):
+    """IntegrityError из-за уникального индекса, а не внешнего ключа."""
+    pgcode = getattr(error.__cause__, 'pgcode', None)
+    if pgcode is not None:
+        return pgcode == UNIQUE_VIOLATION
+    return str(error).startswith('UNIQUE constraint failed')
+
+
+class ReviewSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     author = serializers.SlugRelatedField(
         slug_field='username',
         read_only=True,
@@ -77,18 +116,22 @@ class ReviewSerializer(serializers.ModelSerializer):
             'pub_date',
         )
 
-    def validate(self, data):
-        author = self.context.get('request').user
-        title_id = self.context.get('view').kwargs['title_id']
-        method = self.context.get('request').method
-        if (author.reviews.filter(title=title_id).exists()
-                and method == 'POST'):
-            raise serializers.ValidationError('Нельзя оставлять больше одного'
-                                              'отзыва!')
-        return data
-
-
-class CommentSerializer(serializers.ModelSerializer):
+    def create(self, validated_data):
+        # Второй отзыв отсекает уникальный индекс (author, title) при
+        # вставке, отдельный exists() перед ней не нужен. Другие ошибки
+        # целостности (например, произведение удалили, пока его запись
+        # жила в кэше родителей) уходят дальше как есть. Транзакцию
+        # откатывает atomic() в perform_create.
+        try:
+            return super().create(validated_data)
+        except IntegrityError as error:
+            if not is_unique_violation(error):
+                raise
+            raise ValidationError({api_settings.NON_FIELD_ERRORS_KEY: [
+                'Нельзя оставлять больше одного отзыва!']})
+
+
+class CommentSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     author = serializers.SlugRelatedField(
         slug_field='username',
         read_only=True,
@@ -125,11 +168,11 @@ class GenreSerializer(serializers.ModelSerializer):
 
 
 class TitleSerializer(serializers.ModelSerializer):
-    genre = serializers.SlugRelatedField(slug_field='slug',
-                                         queryset=Genre.objects.all(),
-                                         many=True)
-    category = serializers.SlugRelatedField(slug_field='slug',
-                                            queryset=Category.objects.all())
+    genre = BatchSlugRelatedField(slug_field='slug',
+                                  queryset=Genre.objects.all(),
+                                  many=True)
+    category = BatchSlugRelatedField(slug_field='slug',
+                                     queryset=Category.objects.all())
 
     class Meta:
         model = Title
@@ -137,13 +180,99 @@ class TitleSerializer(serializers.ModelSerializer):
                   'description', 'genre', 'category')
 
 
-class ReadOnlyTitleSerializer(serializers.ModelSerializer):
+class ReadOnlyTitleSerializer(SparseFieldsMixin,
+                              serializers.ModelSerializer):
     genre = GenreSerializer(many=True, read_only=True)
     category = CategorySerializer(read_only=True)
     rating = serializers.IntegerField(read_only=True)
 
+    collapsed_fields = {
+        'genre': serializers.SlugRelatedField(
+            slug_field='slug', many=True, read_only=True),
+        'category': serializers.SlugRelatedField(
+            slug_field='slug', read_only=True),
+    }
+
     class Meta:
         model = Title
         fields = ('id', 'name', 'year',
                   'rating', 'description',
                   'genre', 'category')
+
+
+class TopTitlesQuerySerializer(serializers.Serializer):
+    genre = serializers.SlugRelatedField(
+        slug_field='slug', queryset=Genre.objects.all(), required=False)
+    category = serializers.SlugRelatedField(
+        slug_field='slug', queryset=Category.objects.all(), required=False)
+    year = serializers.IntegerField(required=False)
+    limit = serializers.IntegerField(
+        min_value=1, max_value=RANKING_MAX_LIMIT, default=10)
+
+    def validate(self, data):
+        if sum(name in data for name in ('genre', 'category', 'year')) > 1:
+            raise ValidationError(
+                'Укажите не больше одного из параметров genre, category, '
+                'year.')
+        return data
+
+
+class SlugUpsertListSerializer(serializers.ListSerializer):
+
+    def validate(self, attrs):
+        slugs = [item['slug'] for item in attrs]
+        if len(set(slugs)) != len(slugs):
+            raise ValidationError('slug в пачке не должны повторяться.')
+        return attrs
+
+    def create(self, validated_data):
+        return bulk.upsert_by_slug(self.child.Meta.model, validated_data)
+
+
+class CategoryBulkSerializer(CategorySerializer):
+
+    class Meta(CategorySerializer.Meta):
+        extra_kwargs = {'slug': {'validators': [validate_slug]}}
+        list_serializer_class = SlugUpsertListSerializer
+
+
+class GenreBulkSerializer(GenreSerializer):
+
+    class Meta(GenreSerializer.Meta):
+        extra_kwargs = {'slug': {'validators': [validate_slug]}}
+        list_serializer_class = SlugUpsertListSerializer
+
+
+class TitleBulkListSerializer(serializers.ListSerializer):
+
+    def to_internal_value(self, data):
+        if isinstance(data, list):
+            preload_slugs(self.child, data)
+        attrs = super().to_internal_value(data)
+        ids = set(Title.objects.filter(
+            pk__in=[item['id'] for item in attrs if 'id' in item]
+        ).values_list('pk', flat=True))
+        errors = [
+            {'id': [f'Произведение {item["id"]} не найдено.']}
+            if 'id' in item and item['id'] not in ids else {}
+            for item in attrs
+        ]
+        if any(errors):
+            raise ValidationError(errors)
+        return attrs
+
+    def validate(self, attrs):
+        ids = [item['id'] for item in attrs if 'id' in item]
+        if len(set(ids)) != len(ids):
+            raise ValidationError('id в пачке не должны повторяться.')
+        return attrs
+
+    def create(self, validated_data):
+        return bulk.upsert_titles(validated_data)
+
+
+class TitleBulkSerializer(TitleSerializer):
+    id = serializers.IntegerField(required=False)
+
+    class Meta(TitleSerializer.Meta):
+        list_serializer_class = TitleBulkListSerializer
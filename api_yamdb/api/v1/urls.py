@@ -3,7 +3,8 @@ from rest_framework import routers
 from rest_framework_simplejwt.views import TokenRefreshView
 
 from .views import (CategoryViewSet, CommentViewSet, GenreViewSet,
-                    ReviewViewSet, TitleViewSet, UserViewSet, signup, token)
+                    ReviewViewSet, TitleViewSet, UserViewSet, health, metrics,
+                    signup, token)
 
 router = routers.DefaultRouter()
 
@@ -30,6 +31,8 @@ authpatterns = [
 
 
 urlpatterns = [
+    path('v1/_metrics', metrics, name='metrics'),
+    path('v1/_health', health, name='health'),
     path('v1/', include(router.urls)),
     path('v1/auth/', include(authpatterns))
 ]
@@ -1,26 +1,40 @@
 from typing import List  # Также не могу сделать всё в PEP-8
 
+from api import db
+from api import metrics as api_metrics
+from api.cache import cache_stats, get_parent, get_title_snapshot
 from django.contrib.auth.tokens import default_token_generator
-from django.db.models import Avg
+from django.db import DatabaseError, transaction
+from django.http import Http404, HttpResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from django.utils.functional import cached_property
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import filters, permissions, response, status, viewsets
-from rest_framework.decorators import action, api_view
+from rest_framework.decorators import action, api_view, permission_classes
 from rest_framework.response import Response
-from rest_framework_simplejwt.tokens import AccessToken
-from reviews.models import Category, Genre, Review, Title
+from reviews import ranking, stats
+from reviews.models import (Category, Comment, Genre, Review, ScoreHistogram,
+                            Title)
+from users import outbox
 from users.models import User
 
 from api_yamdb.settings import DOMAIN_NAME
 
-from .filters import TitleFilter
-from .mixins import ListCreateDestroyViewSet
+from . import export
+from .authentication import issue_token
+from .filters import TitleFilter, TitleSearchFilter
+from .mixins import (BulkUpsertMixin, CachedListMixin, ConditionalGetMixin,
+                     ConditionalListMixin, ListCreateDestroyViewSet,
+                     OptimizedQuerysetMixin, not_modified, set_validators)
+from .pagination import FeedPagination
 from .permissions import IsAdmin, IsAdminUserOrReadOnly, IsAuthorOrAdmin
-from .serializers import (CategorySerializer, CommentSerializer,
+from .serializers import (CategoryBulkSerializer, CategorySerializer,
+                          CommentSerializer, GenreBulkSerializer,
                           GenreSerializer, ReadOnlyTitleSerializer,
-                          ReviewSerializer, SignUpSerializer, TitleSerializer,
-                          TokenSerializer, UserSerializer)
+                          ReviewSerializer, SignUpSerializer,
+                          TitleBulkSerializer, TitleSerializer,
+                          TokenSerializer, TopTitlesQuerySerializer,
+                          UserSerializer)
 
 
 @api_view(['POST'])
@@ -30,26 +44,59 @@ def token(request):
     user = get_object_or_404(User, username=request.data['username'])
     confirmation_code = request.data['confirmation_code']
     if default_token_generator.check_token(user, confirmation_code):
-        token = AccessToken.for_user(user)
+        token = issue_token(user)
         response = {
             'username': request.data['username'], 'token': str(token), }
         return Response(response, status=status.HTTP_200_OK)
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
+@api_view(['GET'])
+@permission_classes([IsAdmin])
+def metrics(request):
+    cache_counts = cache_stats()
+    body = api_metrics.render([
+        ('api_cache_hits_total', 'counter', 'Попадания в кэш каталога.',
+         cache_counts['hit']),
+        ('api_cache_misses_total', 'counter', 'Промахи кэша каталога.',
+         cache_counts['miss']),
+        ('email_outbox_queue_depth', 'gauge', 'Неотправленные письма.',
+         outbox.queue_depth()),
+        ('db_connections_open', 'gauge', 'Открытые соединения с БД.',
+         db.pool_status()['open']),
+    ])
+    return HttpResponse(
+        body, content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+@api_view(['GET'])
+@permission_classes([permissions.AllowAny])
+def health(request):
+    """Доступность БД; подробности о соединениях — администраторам."""
+    try:
+        report = db.check_database()
+    except DatabaseError:
+        return Response({'status': 'unavailable'},
+                        status=status.HTTP_503_SERVICE_UNAVAILABLE)
+    data = {'status': 'ok'}
+    if request.user.is_authenticated and request.user.is_admin:
+        data['database'] = report
+    return Response(data)
+
+
 @api_view(['POST'])
 def signup(request):
     serializer = SignUpSerializer(data=request.data)
     serializer.is_valid(raise_exception=True)
-    user, _ = User.objects.get_or_create(
-        username=serializer.validated_data['username'],
-        email=serializer.validated_data['email'])
-    confirmation_code = default_token_generator.make_token(user)
-    user.email_user(
-        subject='Сonfirmation code',
-        message=f'Yamdb. Код подтверждения -  {confirmation_code}',
-        from_email=DOMAIN_NAME,
-    )
+    with transaction.atomic():
+        user = serializer.save()
+        confirmation_code = default_token_generator.make_token(user)
+        outbox.enqueue(
+            recipient=user.email,
+            subject='Сonfirmation code',
+            body=f'Yamdb. Код подтверждения -  {confirmation_code}',
+            from_email=DOMAIN_NAME,
+        )
     return Response(serializer.data, status=status.HTTP_200_OK)
 
 
@@ -73,60 +120,88 @@ class UserViewSet(viewsets.ModelViewSet):
         permission_classes=[permissions.IsAuthenticated],
     )
     def get_self_user_page(self, request):
+        user = get_object_or_404(User, pk=request.user.pk)
         if request.method == 'GET':
-            serializer = self.serializer_class(request.user)
+            serializer = self.serializer_class(user)
             return response.Response(
                 serializer.data,
                 status=status.HTTP_200_OK,
             )
         serializer = self.serializer_class(
-            request.user,
+            user,
             data=request.data,
             partial=True,
         )
         serializer.is_valid(raise_exception=True)
-        serializer.save(role=request.user.role)
+        serializer.save(role=user.role)
         return response.Response(serializer.data, status=status.HTTP_200_OK)
 
 
-class ReviewViewSet(viewsets.ModelViewSet):
+class ReviewViewSet(ConditionalGetMixin, OptimizedQuerysetMixin,
+                    viewsets.ModelViewSet):
     serializer_class = ReviewSerializer
     permission_classes = (
         permissions.IsAuthenticatedOrReadOnly,
         IsAuthorOrAdmin,
     )
+    pagination_class = FeedPagination
 
     @cached_property
-    def _title(self) -> Title:
-        return get_object_or_404(Title, id=self.kwargs.get('title_id'))
+    def _title_id(self) -> int:
+        title_id = int(self.kwargs.get('title_id'))
+        if get_parent(Title, title_id) is None:
+            raise Http404
+        return title_id
 
-    def get_queryset(self) -> List[Title]:
-        return self._title.reviews.all()
+    def get_queryset(self) -> List[Review]:
+        return self.optimize(Review.objects.filter(title_id=self._title_id))
 
     def perform_create(
         self,
         serializer: ReviewSerializer,
     ) -> None:
-        serializer.save(
-            author=self.request.user,
-            title=self._title,
-        )
+        # Рейтинг, таблицы рейтинга и гистограмму оценок обновляют
+        # сигналы reviews.signals, в той же транзакции.
+        with transaction.atomic():
+            serializer.save(
+                author=self.request.user,
+                title_id=self._title_id,
+            )
 
+    def perform_update(
+        self,
+        serializer: ReviewSerializer,
+    ) -> None:
+        with transaction.atomic():
+            serializer.save()
+
+    def perform_destroy(self, instance: Review) -> None:
+        with transaction.atomic():
+            instance.delete()
 
-class CommentViewSet(viewsets.ModelViewSet):
+
+class CommentViewSet(ConditionalGetMixin, OptimizedQuerysetMixin,
+                     viewsets.ModelViewSet):
     serializer_class = CommentSerializer
     permission_classes = (
         permissions.IsAuthenticatedOrReadOnly,
         IsAuthorOrAdmin,
     )
+    pagination_class = FeedPagination
 
     @cached_property
-    def _review(self) -> Review:
-        return get_object_or_404(Review, id=self.kwargs.get('review_id'),
-                                 title__id=self.kwargs.get('title_id'))
+    def _review_id(self) -> int:
+        title_id = int(self.kwargs.get('title_id'))
+        review_id = int(self.kwargs.get('review_id'))
+        review = get_parent(Review, review_id, 'title_id')
+        if (review is None or review['title_id'] != title_id
+                or get_parent(Title, title_id) is None):
+            raise Http404
+        return review_id
 
-    def get_queryset(self) -> List[Review]:
-        return self._review.comments.all()
+    def get_queryset(self) -> List[Comment]:
+        return self.optimize(
+            Comment.objects.filter(review_id=self._review_id))
 
     def perform_create(
         self,
@@ -134,37 +209,99 @@ class CommentViewSet(viewsets.ModelViewSet):
     ) -> None:
         serializer.save(
             author=self.request.user,
-            review=self._review,
+            review_id=self._review_id,
         )
 
 
-class GenreViewSet(ListCreateDestroyViewSet):
+class GenreViewSet(CachedListMixin, ConditionalListMixin, BulkUpsertMixin,
+                   ListCreateDestroyViewSet):
     queryset = Genre.objects.all()
     serializer_class = GenreSerializer
+    bulk_serializer_class = GenreBulkSerializer
     permission_classes = (IsAdminUserOrReadOnly,)
     filter_backends = [filters.SearchFilter]
     search_fields = ['name']
     lookup_field = 'slug'
 
 
-class CategoryViewSet(ListCreateDestroyViewSet):
+class CategoryViewSet(CachedListMixin, ConditionalListMixin,
+                      BulkUpsertMixin, ListCreateDestroyViewSet):
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
+    bulk_serializer_class = CategoryBulkSerializer
     permission_classes = (IsAdminUserOrReadOnly,)
     filter_backends = [filters.SearchFilter]
     search_fields = ['name']
     lookup_field = 'slug'
 
 
-class TitleViewSet(viewsets.ModelViewSet):
-    queryset = Title.objects.annotate(
-        rating=Avg('reviews__score')
-    ).all()
+class TitleViewSet(ConditionalGetMixin, OptimizedQuerysetMixin,
+                   BulkUpsertMixin, viewsets.ModelViewSet):
+    queryset = Title.objects.all()
+    lookup_value_regex = r'\d+'
+    bulk_serializer_class = TitleBulkSerializer
     permission_classes = (IsAdminUserOrReadOnly,)
-    filter_backends = [DjangoFilterBackend]
+    filter_backends = [DjangoFilterBackend, TitleSearchFilter]
     filterset_class = TitleFilter
 
     def get_serializer_class(self):
-        if self.action in ('retrieve', 'list'):
+        if self.action in ('retrieve', 'list', 'top'):
             return ReadOnlyTitleSerializer
         return TitleSerializer
+
+    def retrieve(self, request, *args, **kwargs):
+        """Ответ из снимка в кэше; ?fields= и ?expand= идут мимо него."""
+        if 'fields' in request.query_params or (
+                'expand' in request.query_params):
+            return super().retrieve(request, *args, **kwargs)
+        data, updated_at = get_title_snapshot(kwargs['pk'], self.snapshot)
+        etag = self.make_etag((data['id'], updated_at))
+        response = not_modified(request, etag, updated_at)
+        if response is not None:
+            return response
+        return set_validators(Response(data), etag, updated_at)
+
+    def snapshot(self):
+        instance = self.get_object()
+        return self.get_serializer(instance).data, instance.updated_at
+
+    @action(detail=True, methods=['GET'], url_path='stats')
+    def score_stats(self, request, pk=None):
+        """Распределение оценок из счётчиков, без агрегатов по отзывам."""
+        histogram = ScoreHistogram.objects.filter(title_id=pk).first()
+        if histogram is None and get_parent(Title, pk) is None:
+            raise Http404
+        return Response(stats.summary(histogram))
+
+    @action(detail=False, methods=['GET'], url_path='top')
+    def top(self, request):
+        """Лучшие произведения по байесовской оценке из таблицы рейтинга."""
+        params = TopTitlesQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        rows = ranking.top(**params.validated_data)
+        titles = self.get_queryset().in_bulk([row[0] for row in rows])
+        rows = [row for row in rows if row[0] in titles]
+        serializer = self.get_serializer(
+            [titles[title_id] for title_id, _, _ in rows], many=True)
+        return Response([
+            {'score': round(score, 2), 'rating_count': count, 'title': data}
+            for (_, score, count), data in zip(rows, serializer.data)
+        ])
+
+    @action(detail=False, methods=['GET'], url_path='export',
+            permission_classes=[IsAdmin])
+    def export(self, request):
+        output = request.query_params.get('output', 'ndjson')
+        if output not in export.FORMATS:
+            return Response(
+                {'output': f'Допустимые значения: '
+                           f'{", ".join(export.FORMATS)}.'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        lines, content_type, filename = export.FORMATS[output]
+        queryset = self.filter_queryset(Title.objects.order_by('pk'))
+        response = StreamingHttpResponse(lines(queryset),
+                                         content_type=content_type)
+        response['Content-Disposition'] = (
+            f'attachment; filename="{filename}"')
+        return response
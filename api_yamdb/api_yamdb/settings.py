@@ -34,6 +34,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'api.middleware.ProfilingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -45,6 +46,9 @@ MIDDLEWARE = [
 
 ROOT_URLCONF = 'api_yamdb.urls'
 
+# Замеры стоимости запросов по маршрутам, см. /api/v1/_metrics.
+PROFILING_ENABLED = os.getenv('PROFILING_ENABLED', 'False') == 'True'
+
 
 TEMPLATES_DIR = os.path.join(BASE_DIR / 'templates')
 TEMPLATES = [
@@ -67,14 +71,71 @@ WSGI_APPLICATION = 'api_yamdb.wsgi.application'
 
 
 # Database
+# DB_ENGINE=postgresql переключает на PostgreSQL (нужен пакет psycopg2).
+# CONN_MAX_AGE держит соединение открытым между запросами, 0 — закрывать.
+
+DB_ENGINE = os.getenv('DB_ENGINE', 'sqlite')
+
+if DB_ENGINE == 'postgresql':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.getenv('POSTGRES_DB', 'yamdb'),
+            'USER': os.getenv('POSTGRES_USER', 'yamdb'),
+            'PASSWORD': os.getenv('POSTGRES_PASSWORD', ''),
+            'HOST': os.getenv('DB_HOST', 'localhost'),
+            'PORT': os.getenv('DB_PORT', '5432'),
+            'CONN_MAX_AGE': int(os.getenv('CONN_MAX_AGE', 60)),
+        }
+    }
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.getenv('SQLITE_PATH', BASE_DIR / 'db.sqlite3'),
+            'CONN_MAX_AGE': int(os.getenv('CONN_MAX_AGE', 60)),
+            'OPTIONS': {'timeout': 20},
+        }
+    }
+
+# Выполняются для каждого нового соединения с SQLite.
+SQLITE_PRAGMAS = {
+    'journal_mode': 'wal',
+    'synchronous': 'normal',
+    'mmap_size': 256 * 1024 * 1024,
+    'cache_size': -64 * 1024,
+    'temp_store': 'memory',
+}
+
+
+# Cache
+# Для Redis задайте REDIS_URL (нужен пакет django-redis).
 
-DATABASES = {
+CACHES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'yamdb',
     }
 }
 
+if os.getenv('REDIS_URL'):
+    CACHES['default'] = {
+        'BACKEND': 'django_redis.cache.RedisCache',
+        'LOCATION': os.getenv('REDIS_URL'),
+    }
+
+CATALOG_CACHE_ALIAS = 'default'
+CATALOG_CACHE_TIMEOUT = int(os.getenv('CATALOG_CACHE_TIMEOUT', 60 * 60))
+# Снимок выводит рейтинг, который меняется с каждым отзывом. Сброс версий
+# доходит только до кэша процесса, принявшего запись, если кэш не общий
+# (LocMemCache), поэтому срок жизни снимка короткий.
+TITLE_SNAPSHOT_TIMEOUT = int(os.getenv('TITLE_SNAPSHOT_TIMEOUT', 10))
+TITLE_SNAPSHOT_LOCK_TIMEOUT = int(
+    os.getenv('TITLE_SNAPSHOT_LOCK_TIMEOUT', 5))
+PARENT_CACHE_TIMEOUT = int(os.getenv('PARENT_CACHE_TIMEOUT', 30))
+TOKEN_VERSION_CACHE_TIMEOUT = int(
+    os.getenv('TOKEN_VERSION_CACHE_TIMEOUT', 60))
+
 
 # Password validation
 
@@ -121,9 +182,16 @@ EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
 
 EMAIL_FOR_AUTH_LETTERS = 'donotrespond@yamdb.com'
 
+# Письма сначала пишутся в таблицу OutgoingEmail. При EMAIL_OUTBOX_ASYNC
+# (по умолчанию) их отправляет только команда send_outbox, и запрос не ждёт
+# почтовый сервер; с EMAIL_OUTBOX_ASYNC=False письмо отправляет сам запрос.
+EMAIL_OUTBOX_ASYNC = os.getenv('EMAIL_OUTBOX_ASYNC', 'True') == 'True'
+EMAIL_OUTBOX_MAX_ATTEMPTS = 5
+EMAIL_OUTBOX_RETRY_DELAY = 30
+
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'api.v1.authentication.ClaimsJWTAuthentication',
     ],
     'DEFAULT_FILTER_BACKENDS': [
         'django_filters.rest_framework.DjangoFilterBackend',
@@ -138,6 +206,16 @@ SIMPLE_JWT = {
     'AUTH_HEADER_TYPES': ('Bearer',),
 }
 
+JWT_CACHE_SIZE = 1024
+
+BULK_MAX_ITEMS = 1000
+
+# Байесовский рейтинг (reviews.ranking): априорная средняя и её вес в
+# оценках. После изменения нужен manage.py rebuild_ratings.
+RANKING_PRIOR_MEAN = 5.5
+RANKING_PRIOR_WEIGHT = 10
+RANKING_MAX_LIMIT = 100
+
 
 SENDER_EMAIL = 'yambd@example.com'
 
@@ -0,0 +1,25 @@
+from django.db import models
+
+
+class NormalizedCharField(models.CharField):
+    """Копия другого поля модели в casefold, заполняется при каждой записи."""
+
+    def __init__(self, *args, source_field=None, **kwargs):
+        self.source_field = source_field
+        kwargs.setdefault('editable', False)
+        kwargs.setdefault('default', '')
+        super().__init__(*args, **kwargs)
+
+    def deconstruct(self):
+        name, path, args, kwargs = super().deconstruct()
+        kwargs['source_field'] = self.source_field
+        return name, path, args, kwargs
+
+    def pre_save(self, model_instance, add):
+        value = normalize(getattr(model_instance, self.source_field))
+        setattr(model_instance, self.attname, value)
+        return value
+
+
+def normalize(value):
+    return (value or '').casefold()
@@ -0,0 +1,62 @@
+# Generated by Django 3.2 on 2026-10-18 20:32
+
+from django.db import migrations, models
+import reviews.fields
+
+BATCH_SIZE = 1000
+TRIGRAM_INDEX = 'title_name_search_trgm_idx'
+
+
+def fill_name_search(apps, schema_editor):
+    Title = apps.get_model('reviews', 'Title')
+    batch = []
+    for title in Title.objects.only('pk', 'name').iterator():
+        title.name_search = reviews.fields.normalize(title.name)
+        batch.append(title)
+        if len(batch) == BATCH_SIZE:
+            Title.objects.bulk_update(batch, ['name_search'])
+            batch = []
+    Title.objects.bulk_update(batch, ['name_search'])
+
+
+def create_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    schema_editor.execute(
+        f'CREATE INDEX IF NOT EXISTS {TRIGRAM_INDEX} ON reviews_title '
+        'USING gin (name_search gin_trgm_ops)')
+
+
+def drop_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(f'DROP INDEX IF EXISTS {TRIGRAM_INDEX}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0007_feed_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='title',
+            name='name_search',
+            field=reviews.fields.NormalizedCharField(default='', editable=False, max_length=512, source_field='name', verbose_name='Название для поиска'),
+        ),
+        migrations.RunPython(fill_name_search, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='title',
+            index=models.Index(fields=['year', 'name'], name='title_year_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='title',
+            index=models.Index(fields=['category', 'name'], name='title_category_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='title',
+            index=models.Index(fields=['name_search'], name='title_name_search_idx'),
+        ),
+        migrations.RunPython(create_trigram_index, drop_trigram_index),
+    ]
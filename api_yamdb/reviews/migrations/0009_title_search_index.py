@@ -0,0 +1,41 @@
+from django.db import migrations
+
+FTS_TABLE = 'reviews_title_fts'
+GIN_INDEX = 'title_search_gin_idx'
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        schema_editor.execute(
+            f'CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} '
+            "USING fts5(name, description, tokenize='unicode61')")
+        schema_editor.execute(
+            f'INSERT INTO {FTS_TABLE} (rowid, name, description) '
+            "SELECT id, name, COALESCE(description, '') FROM reviews_title")
+    elif vendor == 'postgresql':
+        from django.contrib.postgres.indexes import GinIndex
+        from reviews.search import search_vector
+
+        Title = apps.get_model('reviews', 'Title')
+        schema_editor.add_index(
+            Title, GinIndex(search_vector(), name=GIN_INDEX))
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        schema_editor.execute(f'DROP TABLE IF EXISTS {FTS_TABLE}')
+    elif vendor == 'postgresql':
+        schema_editor.execute(f'DROP INDEX IF EXISTS {GIN_INDEX}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0008_title_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,90 @@
+# Generated by Django 3.2 on 2026-10-18 21:03
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def fill_ranking(apps, schema_editor):
+    Title = apps.get_model('reviews', 'Title')
+    TitleRanking = apps.get_model('reviews', 'TitleRanking')
+    GenreRanking = apps.get_model('reviews', 'GenreRanking')
+    titles = list(Title.objects.filter(rating_count__gt=0).values(
+        'pk', 'rating_sum', 'rating_count', 'year', 'category_id'))
+    weight = settings.RANKING_PRIOR_WEIGHT
+    mean = settings.RANKING_PRIOR_MEAN
+    scores = {
+        title['pk']: (weight * mean + title['rating_sum'])
+        / (weight + title['rating_count'])
+        for title in titles
+    }
+    TitleRanking.objects.bulk_create(
+        TitleRanking(title_id=title['pk'], score=scores[title['pk']],
+                     rating_count=title['rating_count'], year=title['year'],
+                     category_id=title['category_id'])
+        for title in titles
+    )
+    GenreRanking.objects.bulk_create(
+        GenreRanking(genre_id=genre_id, title_id=title_id,
+                     score=scores[title_id])
+        for title_id, genre_id in Title.genre.through.objects.filter(
+            title_id__in=list(scores)).values_list('title_id', 'genre_id')
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0010_updated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TitleRanking',
+            fields=[
+                ('title', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='ranking', serialize=False, to='reviews.title', verbose_name='Произведение')),
+                ('score', models.FloatField(verbose_name='Байесовская оценка')),
+                ('rating_count', models.PositiveIntegerField(verbose_name='Количество оценок')),
+                ('year', models.PositiveSmallIntegerField(verbose_name='Год релиза')),
+                ('category', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='reviews.category', verbose_name='Категория')),
+            ],
+            options={
+                'verbose_name': 'Место в рейтинге',
+                'verbose_name_plural': 'Рейтинг произведений',
+            },
+        ),
+        migrations.CreateModel(
+            name='GenreRanking',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField(verbose_name='Байесовская оценка')),
+                ('genre', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='reviews.genre', verbose_name='Жанр')),
+                ('title', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='genre_rankings', to='reviews.title', verbose_name='Произведение')),
+            ],
+            options={
+                'verbose_name': 'Место в рейтинге жанра',
+                'verbose_name_plural': 'Рейтинг по жанрам',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='titleranking',
+            index=models.Index(fields=['-score', 'title'], name='ranking_score_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='titleranking',
+            index=models.Index(fields=['year', '-score', 'title'], name='ranking_year_score_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='titleranking',
+            index=models.Index(fields=['category', '-score', 'title'], name='ranking_category_score_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='genreranking',
+            index=models.Index(fields=['genre', '-score', 'title'], name='genre_ranking_score_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='genreranking',
+            constraint=models.UniqueConstraint(fields=('genre', 'title'), name='unique_genre_ranking'),
+        ),
+        migrations.RunPython(fill_ranking, migrations.RunPython.noop),
+    ]
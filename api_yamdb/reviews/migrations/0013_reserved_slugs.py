@@ -0,0 +1,24 @@
+# Generated by Django 3.2 on 2026-10-18 21:37
+
+from django.db import migrations, models
+import reviews.validators
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0012_score_histogram'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='category',
+            name='slug',
+            field=models.SlugField(unique=True, validators=[reviews.validators.validate_slug], verbose_name='"slug" категории'),
+        ),
+        migrations.AlterField(
+            model_name='genre',
+            name='slug',
+            field=models.SlugField(unique=True, validators=[reviews.validators.validate_slug], verbose_name='"slug" жанра'),
+        ),
+    ]
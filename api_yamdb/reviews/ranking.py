@@ -0,0 +1,102 @@
+"""Рейтинг произведений по байесовскому среднему.
+
+score = (C * m + сумма оценок) / (C + число оценок), где m и C —
+settings.RANKING_PRIOR_MEAN и RANKING_PRIOR_WEIGHT. У произведения
+с парой оценок score близок к m, так что оно не обгоняет произведения
+с сотнями оценок. m задан настройкой, а не считается по каталогу:
+тогда оценка зависит только от отзывов самого произведения и её можно
+обновлять по одной строке. В таблицы рейтинга попадают только
+оценённые произведения; выборка лучших идёт по индексам
+(…, -score, title).
+"""
+from itertools import islice
+
+from django.conf import settings
+
+from .models import GenreRanking, Title, TitleRanking
+
+BATCH_SIZE = 5000
+TITLE_FIELDS = ('pk', 'rating_sum', 'rating_count', 'year', 'category_id')
+
+
+def bayesian(rating_sum, rating_count):
+    weight = settings.RANKING_PRIOR_WEIGHT
+    return ((weight * settings.RANKING_PRIOR_MEAN + rating_sum)
+            / (weight + rating_count))
+
+
+def _write(titles):
+    """Вставляет строки рейтинга для оценённых произведений."""
+    titles = {title['pk']: title for title in titles
+              if title['rating_count']}
+    scores = {
+        pk: bayesian(title['rating_sum'], title['rating_count'])
+        for pk, title in titles.items()
+    }
+    TitleRanking.objects.bulk_create(
+        TitleRanking(title_id=pk, score=scores[pk],
+                     rating_count=title['rating_count'],
+                     year=title['year'], category_id=title['category_id'])
+        for pk, title in titles.items()
+    )
+    GenreRanking.objects.bulk_create(
+        GenreRanking(genre_id=genre_id, title_id=title_id,
+                     score=scores[title_id])
+        for title_id, genre_id in Title.genre.through.objects.filter(
+            title_id__in=list(titles)).values_list('title_id', 'genre_id')
+    )
+
+
+def rebuild_titles(title_ids):
+    """Заново собирает строки после правки года, категории или жанров."""
+    title_ids = list(title_ids)
+    TitleRanking.objects.filter(title_id__in=title_ids).delete()
+    GenreRanking.objects.filter(title_id__in=title_ids).delete()
+    _write(Title.objects.filter(pk__in=title_ids).values(*TITLE_FIELDS))
+
+
+def update_score(title_id):
+    """Обновляет оценку после изменения отзывов: два UPDATE по ключу."""
+    title = Title.objects.filter(pk=title_id).values(*TITLE_FIELDS).first()
+    if title is None:
+        return
+    if not title['rating_count']:
+        rebuild_titles([title_id])
+        return
+    score = bayesian(title['rating_sum'], title['rating_count'])
+    updated = TitleRanking.objects.filter(title_id=title_id).update(
+        score=score, rating_count=title['rating_count'])
+    if updated:
+        GenreRanking.objects.filter(title_id=title_id).update(score=score)
+    else:
+        _write([title])
+
+
+def rebuild():
+    """Полный пересчёт, например после загрузки CSV или смены настроек."""
+    TitleRanking.objects.all().delete()
+    GenreRanking.objects.all().delete()
+    titles = Title.objects.filter(rating_count__gt=0).order_by().values(
+        *TITLE_FIELDS).iterator(chunk_size=BATCH_SIZE)
+    while True:
+        batch = list(islice(titles, BATCH_SIZE))
+        if not batch:
+            return
+        _write(batch)
+
+
+def top(limit, genre=None, category=None, year=None):
+    """Тройки (title_id, score, rating_count) лучших произведений."""
+    if genre is not None:
+        return list(
+            GenreRanking.objects.filter(genre=genre)
+            .order_by('-score', 'title')
+            .values_list('title_id', 'score', 'title__rating_count')[:limit]
+        )
+    queryset = TitleRanking.objects.all()
+    if category is not None:
+        queryset = queryset.filter(category=category)
+    if year is not None:
+        queryset = queryset.filter(year=year)
+    return list(queryset.order_by('-score', 'title').values_list(
+        'title_id', 'score', 'rating_count')[:limit])
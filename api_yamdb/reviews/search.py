@@ -0,0 +1,91 @@
+"""Полнотекстовый поиск по названию и описанию произведений.
+
+На PostgreSQL используется SearchVector с GIN-индексом по тому же
+выражению, на SQLite — виртуальная таблица FTS5, которую синхронизируют
+сигналы модели Title.
+"""
+import re
+
+from django.db import connection
+
+from .models import Title
+
+SEARCH_CONFIG = 'simple'
+FTS_TABLE = 'reviews_title_fts'
+NAME_WEIGHT = 10.0
+DESCRIPTION_WEIGHT = 1.0
+
+
+def search_vector():
+    from django.contrib.postgres.search import SearchVector
+
+    return (SearchVector('name', weight='A', config=SEARCH_CONFIG)
+            + SearchVector('description', weight='B', config=SEARCH_CONFIG))
+
+
+def uses_fts5(db_connection=connection):
+    return db_connection.vendor == 'sqlite'
+
+
+def fts5_query(text):
+    """Превращает ввод пользователя в безопасный префиксный запрос FTS5."""
+    words = re.findall(r'\w+', text)
+    return ' '.join(f'"{word}"*' for word in words)
+
+
+def search_titles(queryset, text):
+    """Отбирает произведения по запросу, лучшие совпадения — первыми."""
+    if connection.vendor == 'postgresql':
+        from django.contrib.postgres.search import SearchQuery, SearchRank
+
+        query = SearchQuery(text, config=SEARCH_CONFIG)
+        return queryset.annotate(
+            search=search_vector(),
+            search_rank=SearchRank(search_vector(), query),
+        ).filter(search=query).order_by('-search_rank', 'pk')
+    if uses_fts5():
+        match = fts5_query(text)
+        if not match:
+            return queryset.none()
+        table = queryset.model._meta.db_table
+        return queryset.extra(
+            tables=[FTS_TABLE],
+            where=[f'{FTS_TABLE}.rowid = {table}.id',
+                   f'{FTS_TABLE} MATCH %s'],
+            params=[match],
+            select={'search_rank': f'bm25({FTS_TABLE}, {NAME_WEIGHT}, '
+                                   f'{DESCRIPTION_WEIGHT})'},
+            order_by=['search_rank', 'pk'],
+        )
+    return queryset.filter(name__icontains=text)
+
+
+def index_title(title):
+    if not uses_fts5():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s',
+                       [title.pk])
+        cursor.execute(
+            f'INSERT INTO {FTS_TABLE} (rowid, name, description) '
+            'VALUES (%s, %s, %s)',
+            [title.pk, title.name, title.description or ''])
+
+
+def unindex_title(pk):
+    if not uses_fts5():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [pk])
+
+
+def rebuild_index():
+    """Перестраивает FTS5 по таблице произведений (после массовых загрузок)."""
+    if not uses_fts5():
+        return
+    table = Title._meta.db_table
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE}')
+        cursor.execute(
+            f'INSERT INTO {FTS_TABLE} (rowid, name, description) '
+            f"SELECT id, name, COALESCE(description, '') FROM {table}")
@@ -0,0 +1,149 @@
+import threading
+
+from django.db import transaction
+from django.db.models import Count, Sum
+from django.db.models.signals import (m2m_changed, post_delete, post_save,
+                                      pre_delete, pre_save)
+from django.dispatch import receiver
+from django.utils import timezone
+from users.models import User
+
+from . import ranking, search, stats
+from .models import Category, Comment, Genre, GenreRanking, Review, Title
+
+# Произведения и авторы, удаляемые сейчас в этом потоке. Их отзывы уходят
+# каскадом, и поштучный пересчёт на каждый отзыв не нужен.
+_deleting = threading.local()
+
+
+def _deleting_titles():
+    return _deleting.__dict__.setdefault('titles', set())
+
+
+def _deleting_authors():
+    return _deleting.__dict__.setdefault('authors', {})
+
+
+@receiver(post_save, sender=Title)
+def index_title(sender, instance, created, **kwargs):
+    search.index_title(instance)
+    if not created:
+        ranking.rebuild_titles([instance.pk])
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+def rerank_genres(sender, instance, action, reverse, pk_set, **kwargs):
+    """Строки рейтинга по жанрам следуют за составом жанров."""
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        ranking.rebuild_titles([instance.pk])
+    elif action == 'post_clear':
+        GenreRanking.objects.filter(genre=instance).delete()
+    else:
+        ranking.rebuild_titles(pk_set)
+
+
+@receiver(pre_save, sender=Review)
+def remember_score(sender, instance, using, **kwargs):
+    """Прежняя оценка: post_save сдвигает рейтинг на разницу."""
+    instance._old_score = None
+    if instance._state.adding:
+        return
+    reviews = sender.objects.using(using).filter(pk=instance.pk)
+    if transaction.get_connection(using).in_atomic_block:
+        reviews = reviews.select_for_update()
+    instance._old_score = reviews.values_list('score', flat=True).first()
+
+
+@receiver(post_save, sender=Review)
+def count_review(sender, instance, created, **kwargs):
+    """Рейтинг произведения следует за отзывами без пересчёта по таблице."""
+    if created:
+        delta, count = instance.score, 1
+    elif instance._old_score not in (None, instance.score):
+        delta, count = instance.score - instance._old_score, 0
+    else:
+        return
+    Title.objects.filter(pk=instance.title_id).update_rating(delta, count)
+    ranking.update_score(instance.title_id)
+    stats.record(instance.title_id, added=instance.score,
+                 removed=instance._old_score)
+
+
+@receiver(post_delete, sender=Review)
+def uncount_review(sender, instance, **kwargs):
+    """Удаление одного отзыва; каскады от произведения и автора — ниже."""
+    if instance.title_id in _deleting_titles():
+        return
+    if instance.author_id in _deleting_authors():
+        return
+    Title.objects.filter(pk=instance.title_id).update_rating(
+        -instance.score, -1)
+    ranking.update_score(instance.title_id)
+    stats.record(instance.title_id, removed=instance.score)
+
+
+@receiver(pre_delete, sender=Title)
+def mark_title_deleting(sender, instance, **kwargs):
+    """Счётчики удаляемого произведения уходят вместе с ним."""
+    _deleting_titles().add(instance.pk)
+
+
+@receiver(post_delete, sender=Title)
+def unmark_title_deleting(sender, instance, **kwargs):
+    _deleting_titles().discard(instance.pk)
+
+
+@receiver(pre_delete, sender=User)
+def uncount_author_reviews(sender, instance, **kwargs):
+    """Снимает оценки автора одним UPDATE на произведение до каскада."""
+    titles = Review.objects.filter(author=instance).order_by().values(
+        'title_id').annotate(total=Sum('score'), count=Count('pk'))
+    for title in titles:
+        Title.objects.filter(pk=title['title_id']).update_rating(
+            -title['total'], -title['count'])
+    _deleting_authors()[instance.pk] = [
+        title['title_id'] for title in titles]
+
+
+@receiver(post_delete, sender=User)
+def recount_author_titles(sender, instance, **kwargs):
+    """Рейтинг и гистограммы затронутых произведений — одной пачкой."""
+    title_ids = _deleting_authors().pop(instance.pk, None)
+    if title_ids:
+        ranking.rebuild_titles(title_ids)
+        stats.rebuild(title_ids)
+
+
+@receiver(post_delete, sender=Title)
+def unindex_title(sender, instance, **kwargs):
+    search.unindex_title(instance.pk)
+
+
+@receiver(post_save, sender=Genre)
+@receiver(pre_delete, sender=Genre)
+def touch_genre_titles(sender, instance, created=False, **kwargs):
+    """Произведения выводят жанры, поэтому их правка меняет и произведения."""
+    if not created:
+        Title.objects.filter(genre=instance).touch()
+
+
+@receiver(post_save, sender=Category)
+@receiver(pre_delete, sender=Category)
+def touch_category_titles(sender, instance, created=False, **kwargs):
+    if not created:
+        Title.objects.filter(category=instance).touch()
+
+
+@receiver(pre_save, sender=User)
+def touch_author_feed(sender, instance, **kwargs):
+    """Отзывы и комментарии выводят имя автора."""
+    if instance.pk is None or instance.get_deferred_fields():
+        return
+    old = sender.objects.filter(pk=instance.pk).values_list(
+        'username', flat=True).first()
+    if old is not None and old != instance.username:
+        now = timezone.now()
+        Review.objects.filter(author=instance).update(updated_at=now)
+        Comment.objects.filter(author=instance).update(updated_at=now)
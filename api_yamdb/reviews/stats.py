@@ -0,0 +1,76 @@
+"""Гистограмма оценок по произведению без агрегатов по отзывам.
+
+Строка ScoreHistogram хранит по счётчику на значение оценки. Запись
+отзыва сдвигает один-два счётчика UPDATE-ом с F(), а число, среднее
+и медиана считаются из этих счётчиков.
+"""
+from django.db.models import Count, F
+
+from .models import SCORES, Review, ScoreHistogram
+
+bucket = ScoreHistogram.bucket
+
+
+def record(title_id, added=None, removed=None):
+    """Учитывает новую оценку added и/или снятую оценку removed.
+
+    Без строки гистограммы она собирается заново, только если оценка
+    добавлена: снимать оценку не с чего.
+    """
+    if added == removed:
+        return
+    changes = {}
+    if added is not None:
+        changes[bucket(added)] = F(bucket(added)) + 1
+    if removed is not None:
+        changes[bucket(removed)] = F(bucket(removed)) - 1
+    updated = ScoreHistogram.objects.filter(title_id=title_id).update(
+        **changes)
+    if not updated and added is not None:
+        rebuild([title_id])
+
+
+def rebuild(title_ids=None):
+    """Пересчитывает строки по таблице отзывов; без title_ids — все."""
+    reviews = Review.objects.all()
+    histograms = ScoreHistogram.objects.all()
+    if title_ids is not None:
+        reviews = reviews.filter(title_id__in=title_ids)
+        histograms = histograms.filter(title_id__in=title_ids)
+    counts = {}
+    for title_id, score, count in reviews.order_by().values_list(
+            'title_id', 'score').annotate(count=Count('pk')):
+        counts.setdefault(title_id, {})[bucket(score)] = count
+    histograms.delete()
+    ScoreHistogram.objects.bulk_create(
+        ScoreHistogram(title_id=title_id, **buckets)
+        for title_id, buckets in counts.items()
+    )
+
+
+def summary(histogram=None):
+    """Гистограмма, число, среднее и медиана оценок."""
+    counts = (histogram.counts() if histogram is not None
+              else dict.fromkeys(SCORES, 0))
+    total = sum(counts.values())
+    if not total:
+        return {'histogram': counts, 'count': 0, 'mean': None,
+                'median': None}
+    return {
+        'histogram': counts,
+        'count': total,
+        'mean': round(sum(score * count
+                          for score, count in counts.items()) / total, 2),
+        'median': (nth_score(counts, (total - 1) // 2)
+                   + nth_score(counts, total // 2)) / 2,
+    }
+
+
+def nth_score(counts, position):
+    """Оценка на месте position (с нуля) в отсортированном ряду."""
+    seen = 0
+    for score in SCORES:
+        seen += counts[score]
+        if seen > position:
+            return score
+    raise IndexError(position)
@@ -7,3 +7,11 @@ def validate_year(value):
         raise ValidationError(
             'Год выпуска не может быть больше текущего.'
         )
+
+
+def validate_slug(value):
+    """Адреса на «_» у API служебные, например …/_bulk/."""
+    if value.startswith('_'):
+        raise ValidationError(
+            'slug не может начинаться с «_».'
+        )
@@ -0,0 +1,39 @@
+# Generated by Django 3.2 on 2026-10-18 20:40
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0002_alter_user_options'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OutgoingEmail',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('recipient', models.EmailField(max_length=254, verbose_name='получатель')),
+                ('subject', models.CharField(max_length=255, verbose_name='тема')),
+                ('body', models.TextField(verbose_name='текст')),
+                ('from_email', models.EmailField(max_length=254, verbose_name='отправитель')),
+                ('status', models.CharField(choices=[('pending', 'Ожидает отправки'), ('sending', 'Отправляется'), ('sent', 'Отправлено'), ('failed', 'Не доставлено')], default='pending', max_length=16, verbose_name='статус')),
+                ('attempts', models.PositiveSmallIntegerField(default=0, verbose_name='попыток отправки')),
+                ('next_attempt_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='следующая попытка')),
+                ('last_error', models.TextField(blank=True, verbose_name='ошибка')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='создано')),
+                ('sent_at', models.DateTimeField(blank=True, null=True, verbose_name='отправлено')),
+            ],
+            options={
+                'verbose_name': 'исходящее письмо',
+                'verbose_name_plural': 'исходящие письма',
+                'ordering': ('created_at',),
+            },
+        ),
+        migrations.AddIndex(
+            model_name='outgoingemail',
+            index=models.Index(fields=['status', 'next_attempt_at'], name='outbox_status_next_idx'),
+        ),
+    ]
@@ -2,6 +2,7 @@ from django.contrib.auth.models import AbstractUser
 from django.contrib.auth.validators import UnicodeUsernameValidator
 from django.core.exceptions import ValidationError
 from django.db import models
+from django.utils import timezone
 
 
 class User(AbstractUser):
@@ -54,6 +55,11 @@ class User(AbstractUser):
         null=False,
         default=USER,
     )
+    token_version = models.PositiveIntegerField(
+        verbose_name='версия токенов',
+        default=0,
+        editable=False,
+    )
 
     REQUIRED_FIELDS = []
 
@@ -94,3 +100,67 @@ class User(AbstractUser):
             )
         ]
         ordering = ('username',)
+
+
+class OutgoingEmail(models.Model):
+    PENDING = 'pending'
+    SENDING = 'sending'
+    SENT = 'sent'
+    FAILED = 'failed'
+
+    STATUSES = (
+        (PENDING, 'Ожидает отправки'),
+        (SENDING, 'Отправляется'),
+        (SENT, 'Отправлено'),
+        (FAILED, 'Не доставлено'),)
+
+    recipient = models.EmailField(
+        verbose_name='получатель',
+        max_length=254,
+    )
+    subject = models.CharField(
+        verbose_name='тема',
+        max_length=255,
+    )
+    body = models.TextField(verbose_name='текст')
+    from_email = models.EmailField(
+        verbose_name='отправитель',
+        max_length=254,
+    )
+    status = models.CharField(
+        verbose_name='статус',
+        max_length=16,
+        choices=STATUSES,
+        default=PENDING,
+    )
+    attempts = models.PositiveSmallIntegerField(
+        verbose_name='попыток отправки',
+        default=0,
+    )
+    next_attempt_at = models.DateTimeField(
+        verbose_name='следующая попытка',
+        default=timezone.now,
+    )
+    last_error = models.TextField(verbose_name='ошибка', blank=True)
+    created_at = models.DateTimeField(
+        verbose_name='создано',
+        auto_now_add=True,
+    )
+    sent_at = models.DateTimeField(
+        verbose_name='отправлено',
+        null=True,
+        blank=True,
+    )
+
+    def __str__(self):
+        return f'{self.recipient}: {self.subject}'
+
+    class Meta:
+
+        verbose_name = 'исходящее письмо'
+        verbose_name_plural = 'исходящие письма'
+        ordering = ('created_at',)
+        indexes = [
+            models.Index(fields=('status', 'next_attempt_at'),
+                         name='outbox_status_next_idx'),
+        ]
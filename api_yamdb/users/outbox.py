@@ -0,0 +1,99 @@
+"""Очередь исходящих писем в базе данных.
+
+Письмо сначала сохраняется в OutgoingEmail, а отправляет его фоновая
+команда send_outbox (по умолчанию) либо сам запрос после коммита
+(EMAIL_OUTBOX_ASYNC = False).
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import OutgoingEmail
+
+LEASE = timedelta(minutes=5)
+
+
+def enqueue(recipient, subject, body, from_email):
+    email = OutgoingEmail.objects.create(
+        recipient=recipient,
+        subject=subject,
+        body=body,
+        from_email=from_email,
+    )
+    if not settings.EMAIL_OUTBOX_ASYNC:
+        transaction.on_commit(lambda: deliver(claim([email.pk])))
+    return email
+
+
+def claim(pks=None, limit=None):
+    """Забирает готовые к отправке письма, продлевая их аренду."""
+    now = timezone.now()
+    with transaction.atomic():
+        queryset = OutgoingEmail.objects.select_for_update(
+            skip_locked=True).filter(
+            Q(status=OutgoingEmail.PENDING) | Q(status=OutgoingEmail.SENDING),
+            next_attempt_at__lte=now,
+        ).order_by('next_attempt_at')
+        if pks is not None:
+            queryset = queryset.filter(pk__in=pks)
+        emails = list(queryset[:limit])
+        OutgoingEmail.objects.filter(
+            pk__in=[email.pk for email in emails]).update(
+            status=OutgoingEmail.SENDING, next_attempt_at=now + LEASE)
+    return emails
+
+
+def backoff(attempts):
+    return timedelta(seconds=settings.EMAIL_OUTBOX_RETRY_DELAY
+                     * 2 ** (attempts - 1))
+
+
+def deliver(emails):
+    """Отправляет пачку писем через одно соединение с почтовым сервером."""
+    if not emails:
+        return 0
+    connection = get_connection(fail_silently=False)
+    try:
+        connection.open()
+    except Exception as error:
+        for email in emails:
+            fail(email, error)
+        return 0
+    sent = 0
+    try:
+        for email in emails:
+            try:
+                EmailMessage(email.subject, email.body, email.from_email,
+                             [email.recipient],
+                             connection=connection).send()
+            except Exception as error:
+                fail(email, error)
+            else:
+                OutgoingEmail.objects.filter(pk=email.pk).update(
+                    status=OutgoingEmail.SENT, sent_at=timezone.now(),
+                    attempts=email.attempts + 1, last_error='')
+                sent += 1
+    finally:
+        connection.close()
+    return sent
+
+
+def fail(email, error):
+    attempts = email.attempts + 1
+    if attempts >= settings.EMAIL_OUTBOX_MAX_ATTEMPTS:
+        status, next_attempt_at = OutgoingEmail.FAILED, timezone.now()
+    else:
+        status = OutgoingEmail.PENDING
+        next_attempt_at = timezone.now() + backoff(attempts)
+    OutgoingEmail.objects.filter(pk=email.pk).update(
+        status=status, attempts=attempts, next_attempt_at=next_attempt_at,
+        last_error=str(error))
+
+
+def queue_depth():
+    return OutgoingEmail.objects.filter(
+        status__in=(OutgoingEmail.PENDING, OutgoingEmail.SENDING)).count()
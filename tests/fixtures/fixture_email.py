@@ -0,0 +1,7 @@
+import pytest
+
+
+@pytest.fixture
+def sync_email(settings):
+    """Письма уходят сразу после коммита, без команды send_outbox."""
+    settings.EMAIL_OUTBOX_ASYNC = False
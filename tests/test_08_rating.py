@@ -0,0 +1,106 @@
+from http import HTTPStatus
+
+import pytest
+from django.core.management import call_command
+
+from tests.utils import create_single_review, create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test08TitleRating:
+
+    def get_rating(self, client, title_id):
+        response = client.get(f'/api/v1/titles/{title_id}/')
+        assert response.status_code == HTTPStatus.OK
+        return response.json()['rating']
+
+    def test_01_rating_follows_review_changes(self, admin_client,
+                                              user_client, moderator_client):
+        titles, _, _ = create_titles(admin_client)
+        title_id = titles[0]['id']
+        assert self.get_rating(admin_client, title_id) is None, (
+            'Рейтинг произведения без отзывов должен быть равен `None`.'
+        )
+
+        review = create_single_review(
+            user_client, title_id, 'review one', 4).json()
+        create_single_review(moderator_client, title_id, 'review two', 9)
+        assert self.get_rating(admin_client, title_id) == 6, (
+            'Рейтинг должен обновляться при создании отзыва.'
+        )
+
+        url = f'/api/v1/titles/{title_id}/reviews/{review["id"]}/'
+        user_client.patch(url, data={'score': 10})
+        assert self.get_rating(admin_client, title_id) == 9, (
+            'Рейтинг должен обновляться при изменении оценки в отзыве.'
+        )
+
+        user_client.delete(url)
+        assert self.get_rating(admin_client, title_id) == 9, (
+            'Рейтинг должен обновляться при удалении отзыва.'
+        )
+        assert self.get_rating(admin_client, titles[1]['id']) is None
+
+    def test_02_rebuild_ratings_command(self, admin_client, user_client):
+        from reviews.models import Title
+
+        titles, _, _ = create_titles(admin_client)
+        title_id = titles[0]['id']
+        create_single_review(user_client, title_id, 'review', 7)
+        Title.objects.update(rating_sum=0, rating_count=0, rating=None)
+
+        call_command('rebuild_ratings')
+        title = Title.objects.get(pk=title_id)
+        assert (title.rating_sum, title.rating_count, title.rating) == (
+            7, 1, 7), (
+            'Команда `rebuild_ratings` должна пересчитывать рейтинг '
+            'по таблице отзывов.'
+        )
+
+    def test_03_rating_follows_cascade_delete(self, admin_client,
+                                              user_client, moderator_client):
+        titles, _, _ = create_titles(admin_client)
+        title_id = titles[0]['id']
+        create_single_review(user_client, title_id, 'review one', 10)
+        create_single_review(moderator_client, title_id, 'review two', 2)
+
+        response = admin_client.delete('/api/v1/users/TestUser/')
+        assert response.status_code == HTTPStatus.NO_CONTENT
+        assert self.get_rating(admin_client, title_id) == 2, (
+            'Удаление пользователя удаляет его отзывы каскадом, и рейтинг '
+            'произведения должен это учитывать.'
+        )
+
+    def test_04_cascade_delete_queries_do_not_grow(self, admin_client,
+                                                   django_user_model):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from reviews.models import Review, Title
+
+        titles, _, _ = create_titles(admin_client)
+        users = [
+            django_user_model.objects.create_user(
+                username=f'cascade_{idx}', email=f'cascade_{idx}@yamdb.fake')
+            for idx in range(6)
+        ]
+        Review.objects.bulk_create(
+            Review(title_id=title['id'], author=author, text='Текст',
+                   score=idx % 10 + 1)
+            for title, authors in ((titles[0], users[:2]),
+                                   (titles[1], users))
+            for idx, author in enumerate(authors)
+        )
+        Title.objects.rebuild_rating()
+
+        def delete_queries(url):
+            with CaptureQueriesContext(connection) as context:
+                response = admin_client.delete(url)
+            assert response.status_code == HTTPStatus.NO_CONTENT
+            return len(context.captured_queries)
+
+        small = delete_queries(f'/api/v1/titles/{titles[0]["id"]}/')
+        large = delete_queries(f'/api/v1/titles/{titles[1]["id"]}/')
+        assert large == small, (
+            'Число запросов при удалении произведения не должно расти '
+            'с числом его отзывов.'
+        )
@@ -0,0 +1,229 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from tests.utils import create_comments, create_titles
+
+
+def count_queries(client, url):
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url)
+    assert response.status_code == HTTPStatus.OK
+    return len(context.captured_queries)
+
+
+@pytest.mark.django_db(transaction=True)
+class Test09QueryCount:
+
+    def test_01_title_list_queries_do_not_grow(self, admin_client, client):
+        titles, _, genres = create_titles(admin_client)
+        url = '/api/v1/titles/'
+        expected = count_queries(client, url)
+
+        for idx in range(3):
+            admin_client.post(url, data={
+                'name': f'Произведение {idx}',
+                'year': 2000,
+                'genre': [genre['slug'] for genre in genres],
+                'category': titles[0]['category'],
+            })
+        assert count_queries(client, url) == expected, (
+            f'Проверьте, что GET-запрос к `{url}` выполняет фиксированное '
+            'число SQL-запросов независимо от количества произведений '
+            'на странице.'
+        )
+        assert expected <= 3, (
+            f'GET-запрос к `{url}` должен загружать категории и жанры '
+            'через select_related/prefetch_related.'
+        )
+
+    def test_02_comment_list_skips_parent_lookup(self, admin_client, admin,
+                                                 client):
+        _, reviews, titles = create_comments(admin_client,
+                                             {admin: admin_client})
+        url = (f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+               f'{reviews[0]["id"]}/comments/')
+        client.get(url)
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(url)
+        assert response.status_code == HTTPStatus.OK
+        parent_queries = [
+            query['sql'] for query in context.captured_queries
+            if 'FROM "reviews_review"' in query['sql']
+            or 'FROM "reviews_title"' in query['sql']
+        ]
+        assert not parent_queries, (
+            f'Повторный GET-запрос к `{url}` должен проверять отзыв и '
+            'произведение по кэшу, без запросов к их таблицам.'
+        )
+
+        response = client.get(
+            f'/api/v1/titles/{titles[1]["id"]}/reviews/'
+            f'{reviews[0]["id"]}/comments/'
+        )
+        assert response.status_code == HTTPStatus.NOT_FOUND, (
+            'Комментарии отзыва, запрошенные через чужое произведение, '
+            'должны возвращать 404.'
+        )
+
+        admin_client.delete(
+            f'/api/v1/titles/{titles[0]["id"]}/reviews/{reviews[0]["id"]}/'
+        )
+        assert client.get(url).status_code == HTTPStatus.NOT_FOUND, (
+            'После удаления отзыва его комментарии должны возвращать 404.'
+        )
+
+    def test_03_signup_reads_users_once(self, client):
+        url = '/api/v1/auth/signup/'
+        data = {'email': 'once@yamdb.fake', 'username': 'once'}
+        for expected_status in (HTTPStatus.OK, HTTPStatus.OK):
+            with CaptureQueriesContext(connection) as context:
+                response = client.post(url, data=data)
+            assert response.status_code == expected_status
+            user_reads = [
+                query['sql'] for query in context.captured_queries
+                if query['sql'].startswith('SELECT')
+                and 'FROM "users_user"' in query['sql']
+            ]
+            assert len(user_reads) == 1, (
+                f'POST-запрос к `{url}` должен проверять уникальность '
+                'email и username одним запросом.'
+            )
+
+        response = client.post(
+            url, data={'email': 'once@yamdb.fake', 'username': 'other'})
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+
+    def test_04_title_write_resolves_slugs_in_batch(self, admin_client):
+        from reviews.models import Category, Genre
+
+        Category.objects.create(name='Фильм', slug='films')
+        Genre.objects.bulk_create(
+            Genre(name=f'Жанр {idx}', slug=f'genre-{idx}')
+            for idx in range(5)
+        )
+        slugs = [f'genre-{idx}' for idx in range(5)]
+
+        def genre_lookups(url, data):
+            with CaptureQueriesContext(connection) as context:
+                response = admin_client.post(url, data=data, format='json')
+            assert response.status_code in (HTTPStatus.OK,
+                                            HTTPStatus.CREATED)
+            return [query['sql'] for query in context.captured_queries
+                    if query['sql'].startswith('SELECT')
+                    and 'FROM "reviews_genre"' in query['sql']
+                    and 'INNER JOIN' not in query['sql']]
+
+        lookups = genre_lookups('/api/v1/titles/', {
+            'name': 'Фильм', 'year': 2000, 'genre': slugs,
+            'category': 'films'})
+        assert len(lookups) == 1, (
+            'Проверьте, что при создании произведения все жанры '
+            'загружаются одним запросом.'
+        )
+        lookups = genre_lookups('/api/v1/titles/_bulk/', [
+            {'name': f'Фильм {idx}', 'year': 2000, 'genre': slugs[idx:],
+             'category': 'films'}
+            for idx in range(5)
+        ])
+        assert len(lookups) == 1, (
+            'Пакетная запись должна загружать жанры одним запросом '
+            'на пачку.'
+        )
+
+    def test_05_review_write_skips_duplicate_lookup(self, admin_client):
+        titles, _, _ = create_titles(admin_client)
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        admin_client.get(url)
+
+        def author_lookups(context):
+            return [
+                query['sql'] for query in context.captured_queries
+                if '"reviews_review"."author_id" ='
+                in query['sql'].partition(' WHERE ')[2]
+            ]
+
+        with CaptureQueriesContext(connection) as context:
+            response = admin_client.post(url, data={'text': 'Да',
+                                                    'score': 5})
+        assert response.status_code == HTTPStatus.CREATED
+        review_id = response.json()['id']
+        assert not author_lookups(context), (
+            'POST-запрос к отзывам не должен заранее искать отзыв автора: '
+            'повтор отсекает уникальный индекс при вставке.'
+        )
+
+        with CaptureQueriesContext(connection) as context:
+            response = admin_client.post(url, data={'text': 'Ещё',
+                                                    'score': 7})
+        assert response.status_code == HTTPStatus.BAD_REQUEST, (
+            'Повторный отзыв автора на произведение должен возвращать 400.'
+        )
+        assert 'non_field_errors' in response.json()
+        assert not author_lookups(context)
+        reviews = admin_client.get(url).json()
+        assert (reviews['count'], reviews['results'][0]['score']) == (1, 5), (
+            'Отклонённый повторный отзыв не должен менять данные.'
+        )
+
+        with CaptureQueriesContext(connection) as context:
+            response = admin_client.patch(f'{url}{review_id}/',
+                                          data={'score': 6})
+        assert response.status_code == HTTPStatus.OK
+        assert not author_lookups(context), (
+            'PATCH-запрос к отзыву не должен проверять уникальность пары '
+            'автор-произведение.'
+        )
+
+    def test_06_review_and_comment_authors_joined(self, admin_client, admin,
+                                                  user_client, user,
+                                                  moderator_client,
+                                                  moderator, client):
+        comments, reviews, titles = create_comments(admin_client,
+                                                    {admin: admin_client})
+        reviews_url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        comments_url = f'{reviews_url}{reviews[0]["id"]}/comments/'
+        expected = {url: count_queries(client, url)
+                    for url in (reviews_url, comments_url)}
+
+        for http_client in (user_client, moderator_client):
+            http_client.post(reviews_url, data={'text': 'Текст', 'score': 3})
+            http_client.post(comments_url, data={'text': 'Текст'})
+        for url, queries in expected.items():
+            assert count_queries(client, url) == queries, (
+                f'GET-запрос к `{url}` должен загружать авторов вместе '
+                'с записями, а не отдельным запросом на каждую.'
+            )
+
+        for url in (f'{reviews_url}{reviews[0]["id"]}/',
+                    f'{comments_url}{comments[0]["id"]}/'):
+            with CaptureQueriesContext(connection) as context:
+                response = admin_client.patch(url, data={'text': 'Правка'})
+            assert response.status_code == HTTPStatus.OK
+            user_lookups = [
+                query['sql'] for query in context.captured_queries
+                if query['sql'].startswith('SELECT')
+                and 'FROM "users_user"' in query['sql']
+            ]
+            # Единственный допустимый запрос — пользователь из токена.
+            assert len(user_lookups) <= 1, (
+                f'PATCH-запрос к `{url}` не должен отдельно загружать '
+                'автора для проверки прав и вывода username.'
+            )
+
+    def test_07_review_create_keeps_other_integrity_errors(
+            self, admin_client, monkeypatch):
+        from django.db import IntegrityError
+        from rest_framework.serializers import ModelSerializer
+
+        titles, _, _ = create_titles(admin_client)
+
+        def create(self, validated_data):
+            raise IntegrityError('FOREIGN KEY constraint failed')
+
+        monkeypatch.setattr(ModelSerializer, 'create', create)
+        with pytest.raises(IntegrityError):
+            admin_client.post(f'/api/v1/titles/{titles[0]["id"]}/reviews/',
+                              data={'text': 'Да', 'score': 5})
@@ -0,0 +1,87 @@
+from base64 import b64encode
+from http import HTTPStatus
+
+import pytest
+
+from tests.utils import create_reviews
+
+
+@pytest.mark.django_db(transaction=True)
+class Test10CursorPagination:
+
+    def test_01_comments_cursor_pages(self, admin_client, admin, user_client,
+                                      user, moderator_client, moderator,
+                                      client):
+        from reviews.models import Comment
+
+        author_map = {
+            admin: admin_client,
+            user: user_client,
+            moderator: moderator_client
+        }
+        reviews, titles = create_reviews(admin_client, author_map)
+        review_id = reviews[0]['id']
+        Comment.objects.bulk_create(
+            Comment(text=f'comment {idx}', author=admin, review_id=review_id)
+            for idx in range(12)
+        )
+        first = Comment.objects.order_by('pk').first()
+        Comment.objects.update(pub_date=first.pub_date)
+
+        url = (f'/api/v1/titles/{titles[0]["id"]}/reviews/{review_id}/'
+               'comments/?pagination=cursor')
+        seen = []
+        while url:
+            response = client.get(url)
+            assert response.status_code == HTTPStatus.OK
+            data = response.json()
+            assert 'count' not in data, (
+                'В режиме курсорной пагинации ответ не должен содержать '
+                'ключ `count`.'
+            )
+            seen.extend(comment['id'] for comment in data['results'])
+            url = data['next']
+
+        expected = list(Comment.objects.order_by('pk').values_list(
+            'pk', flat=True))
+        assert seen == expected, (
+            'Курсорная пагинация должна обходить комментарии по '
+            '(pub_date, id) без пропусков и повторов.'
+        )
+
+    def test_02_invalid_cursor(self, admin_client, admin, client):
+        reviews, titles = create_reviews(admin_client, {admin: admin_client})
+        response = client.get(
+            f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+            '?pagination=cursor&cursor=broken'
+        )
+        assert response.status_code == HTTPStatus.NOT_FOUND
+
+        for value in ('garbage|5', '2024-13-01T00:00:00|5'):
+            cursor = b64encode(value.encode()).decode()
+            response = client.get(
+                f'/api/v1/titles/{titles[0]["id"]}/reviews/',
+                {'pagination': 'cursor', 'cursor': cursor}
+            )
+            assert response.status_code == HTTPStatus.NOT_FOUND, (
+                'Курсор с некорректной датой должен возвращать 404, '
+                'а не ошибку сервера.'
+            )
+
+    def test_03_cursor_uses_index_range(self):
+        from api.v1.pagination import KeysetPagination
+        from django.db import connection
+        from django.utils import timezone
+        from reviews.models import Comment, Review
+
+        if connection.vendor != 'sqlite':
+            pytest.skip('План запроса проверяется только на SQLite.')
+        paginator = KeysetPagination()
+        for model, parent in ((Review, 'title'), (Comment, 'review')):
+            queryset = model.objects.filter(**{parent: 1}).order_by(
+                *paginator.ordering)
+            plan = paginator.after(queryset, timezone.now(), 5).explain()
+            assert 'pub_date>' in plan, (
+                'Страница после курсора должна читать индекс диапазоном '
+                f'по pub_date, а не с начала родителя. План: {plan}'
+            )
@@ -0,0 +1,55 @@
+from http import HTTPStatus
+
+import pytest
+
+from tests.utils import create_genre
+
+
+@pytest.mark.django_db(transaction=True)
+class Test11CatalogCache:
+
+    def test_01_genre_list_cached_and_invalidated(self, admin_client, client):
+        from api.cache import cache_stats
+
+        genres = create_genre(admin_client)
+        url = '/api/v1/genres/'
+        before = cache_stats()
+
+        response = client.get(url)
+        assert response.status_code == HTTPStatus.OK
+        assert response['X-Cache'] == 'MISS'
+        response = client.get(url)
+        assert response['X-Cache'] == 'HIT', (
+            f'Повторный GET-запрос к `{url}` должен обслуживаться из кэша.'
+        )
+        assert response.json()['count'] == len(genres)
+
+        response = client.get(f'{url}?search=Драма')
+        assert response['X-Cache'] == 'MISS'
+        assert response.json()['count'] == 1
+
+        admin_client.delete(f'{url}{genres[0]["slug"]}/')
+        response = client.get(url)
+        assert response['X-Cache'] == 'MISS', (
+            'Удаление жанра должно сбрасывать кэш списка жанров.'
+        )
+        assert response.json()['count'] == len(genres) - 1
+
+        after = cache_stats()
+        assert after['hit'] - before['hit'] == 1
+        assert after['miss'] - before['miss'] == 3
+
+    def test_02_versions_do_not_expire(self, monkeypatch):
+        import time
+
+        from api.cache import _snapshot_key, get_version
+        from reviews.models import Genre
+
+        version, snapshot_key = get_version(Genre), _snapshot_key(1)
+        now = time.time()
+        monkeypatch.setattr(time, 'time', lambda: now + 24 * 60 * 60)
+        assert (get_version(Genre), _snapshot_key(1)) == (
+            version, snapshot_key), (
+            'Версии кэша должны храниться без срока: иначе по истечении '
+            'TIMEOUT бэкенда все закэшированные ответы теряются.'
+        )
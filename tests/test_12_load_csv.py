@@ -0,0 +1,51 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+
+@pytest.mark.django_db(transaction=True)
+class Test12LoadCsv:
+
+    def test_01_load_and_reload(self):
+        from reviews.models import Comment, Review, Title, User
+
+        call_command('load_csv_files', batch_size=7, stdout=StringIO())
+        counts = (User.objects.count(), Title.objects.count(),
+                  Title.genre.through.objects.count(),
+                  Review.objects.count(), Comment.objects.count())
+        assert counts == (5, 32, 42, 2, 0), (
+            'Команда `load_csv_files` должна загружать пользователей, '
+            'произведения, связи жанров и отзывы, пропуская комментарии '
+            'к несуществующим отзывам.'
+        )
+        title = Title.objects.get(pk=1)
+        assert title.rating_count == 2 and title.rating is not None, (
+            'После загрузки отзывов рейтинг произведений должен быть '
+            'пересчитан.'
+        )
+        assert str(Review.objects.get(pk=1).pub_date.date()) == '2019-09-24'
+
+        call_command('load_csv_files', stdout=StringIO())
+        assert User.objects.count() == counts[0], (
+            'Повторная загрузка не должна дублировать строки.'
+        )
+
+    def test_02_dependency_graph(self):
+        from api.management.commands.load_csv_files import (TABLES,
+                                                            dependency_graph)
+        from reviews.models import (Category, Comment, Genre, Review, Title,
+                                    User)
+
+        graph = dependency_graph(TABLES)
+        assert graph[User] == graph[Category] == graph[Genre] == set()
+        assert graph[Title] == {Category}
+        assert graph[Title.genre.through] == {Title, Genre}
+        assert graph[Review] == {Title, User}
+        assert graph[Comment] == {Review, User}
+
+    def test_03_load_with_workers(self):
+        from reviews.models import Title
+
+        call_command('load_csv_files', workers=3, stdout=StringIO())
+        assert Title.genre.through.objects.count() == 42
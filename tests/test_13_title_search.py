@@ -0,0 +1,47 @@
+from http import HTTPStatus
+
+import pytest
+
+from tests.utils import create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test13TitleSearch:
+
+    def search(self, client, text):
+        response = client.get('/api/v1/titles/', {'search': text})
+        assert response.status_code == HTTPStatus.OK
+        return [title['id'] for title in response.json()['results']]
+
+    def test_01_search_ranks_name_over_description(self, admin_client,
+                                                   client):
+        titles, categories, genres = create_titles(admin_client)
+        response = admin_client.post('/api/v1/titles/', data={
+            'name': 'Назад в будущее',
+            'year': 1985,
+            'genre': [genres[1]['slug']],
+            'category': categories[0]['slug'],
+            'description': 'Док строит машину времени, как терминатор.',
+        })
+        by_description = response.json()['id']
+
+        assert self.search(client, 'терминатор') == [
+            titles[0]['id'], by_description], (
+            'Поиск должен находить совпадения в названии и описании, '
+            'ставя совпадения в названии первыми.'
+        )
+        assert self.search(client, 'ОРЕШ') == [titles[1]['id']], (
+            'Поиск должен быть регистронезависимым и находить слова '
+            'по префиксу.'
+        )
+        assert self.search(client, '"(') == []
+
+    def test_02_search_follows_title_changes(self, admin_client, client):
+        titles, _, _ = create_titles(admin_client)
+        url = f'/api/v1/titles/{titles[0]["id"]}/'
+        admin_client.patch(url, data={'name': 'Хищник'})
+        assert self.search(client, 'хищник') == [titles[0]['id']]
+        assert self.search(client, 'Терминатор') == []
+
+        admin_client.delete(url)
+        assert self.search(client, 'хищник') == []
@@ -0,0 +1,52 @@
+from http import HTTPStatus
+from io import StringIO
+
+import pytest
+from django.core import mail
+from django.core.management import call_command
+
+
+@pytest.mark.django_db(transaction=True)
+class Test14EmailOutbox:
+    url_signup = '/api/v1/auth/signup/'
+    valid_data = {'email': 'queued@yamdb.fake', 'username': 'queued'}
+
+    def test_01_async_signup_is_queued(self, client):
+        from users.models import OutgoingEmail
+        from users.outbox import queue_depth
+
+        outbox_before_count = len(mail.outbox)
+        response = client.post(self.url_signup, data=self.valid_data)
+        assert response.status_code == HTTPStatus.OK
+        assert len(mail.outbox) == outbox_before_count, (
+            'По умолчанию письмо должно только попадать в очередь.'
+        )
+        assert queue_depth() == 1
+
+        call_command('send_outbox', once=True, stdout=StringIO())
+        assert len(mail.outbox) == outbox_before_count + 1
+        assert mail.outbox[-1].to == [self.valid_data['email']]
+        email = OutgoingEmail.objects.get()
+        assert email.status == OutgoingEmail.SENT and email.attempts == 1
+        assert queue_depth() == 0
+
+    def test_02_failed_delivery_is_retried_later(self, client, settings,
+                                                 monkeypatch):
+        from django.core.mail import EmailMessage
+        from users.models import OutgoingEmail
+
+        def broken_send(self, fail_silently=False):
+            raise ConnectionError('SMTP недоступен')
+
+        monkeypatch.setattr(EmailMessage, 'send', broken_send)
+        settings.EMAIL_OUTBOX_ASYNC = True
+        client.post(self.url_signup, data=self.valid_data)
+        call_command('send_outbox', once=True, stdout=StringIO())
+
+        email = OutgoingEmail.objects.get()
+        assert email.status == OutgoingEmail.PENDING
+        assert email.attempts == 1
+        assert 'SMTP' in email.last_error
+        assert email.next_attempt_at > email.created_at, (
+            'Неудачная отправка должна откладываться с задержкой.'
+        )
@@ -0,0 +1,57 @@
+from http import HTTPStatus
+
+import pytest
+from django.contrib.auth.tokens import default_token_generator
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+
+def claims_client(user):
+    response = APIClient().post('/api/v1/auth/token/', data={
+        'username': user.username,
+        'confirmation_code': default_token_generator.make_token(user),
+    })
+    assert response.status_code == HTTPStatus.OK
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f'Bearer {response.json()["token"]}')
+    return client
+
+
+@pytest.mark.django_db(transaction=True)
+class Test15ClaimsAuthentication:
+
+    def test_01_claims_token_skips_user_query(self, admin):
+        client = claims_client(admin)
+        url = '/api/v1/users/'
+        client.get(url)
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(url)
+        assert response.status_code == HTTPStatus.OK, (
+            'Администратор с токеном из `/api/v1/auth/token/` должен '
+            f'получать доступ к `{url}`.'
+        )
+        auth_queries = [
+            query['sql'] for query in context.captured_queries
+            if 'WHERE "users_user"."id"' in query['sql']
+        ]
+        assert not auth_queries, (
+            'Аутентификация по токену с claims не должна загружать '
+            'пользователя из БД.'
+        )
+
+        response = client.get('/api/v1/users/me/')
+        assert response.json()['email'] == admin.email
+
+    def test_02_role_change_revokes_token(self, admin_client, user):
+        client = claims_client(user)
+        assert client.get('/api/v1/users/me/').status_code == HTTPStatus.OK
+
+        admin_client.patch(f'/api/v1/users/{user.username}/',
+                           data={'role': 'moderator'})
+        response = client.get('/api/v1/users/me/')
+        assert response.status_code == HTTPStatus.UNAUTHORIZED, (
+            'После смены роли ранее выданный токен должен быть отозван.'
+        )
+        assert claims_client(user).get(
+            '/api/v1/users/me/').json()['role'] == 'moderator'
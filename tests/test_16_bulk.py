@@ -0,0 +1,104 @@
+import json
+from http import HTTPStatus
+
+import pytest
+
+from tests.utils import create_categories, create_genre
+
+
+@pytest.mark.django_db(transaction=True)
+class Test16BulkUpsert:
+
+    def test_01_genres_upsert(self, admin_client, user_client, client):
+        genres = create_genre(admin_client)
+        url = '/api/v1/genres/_bulk/'
+        data = [
+            {'name': 'Ужасы и мистика', 'slug': genres[0]['slug']},
+            {'name': 'Вестерн', 'slug': 'western'},
+        ]
+        response = user_client.post(url, data=data, format='json')
+        assert response.status_code == HTTPStatus.FORBIDDEN
+
+        client.get('/api/v1/genres/')
+        response = admin_client.post(url, data=data, format='json')
+        assert response.status_code == HTTPStatus.OK, (
+            f'POST-запрос администратора к `{url}` с массивом жанров '
+            'должен возвращать 200.'
+        )
+        assert response.json() == {'created': 1, 'updated': 1}
+        names = {genre['slug']: genre['name']
+                 for genre in client.get('/api/v1/genres/?limit=10')
+                 .json()['results']}
+        response = client.get('/api/v1/genres/?search=Вестерн')
+        assert response.json()['count'] == 1, (
+            'Пакетная запись должна сбрасывать кэш списка жанров.'
+        )
+        assert names[genres[0]['slug']] == 'Ужасы и мистика'
+
+        response = admin_client.post(
+            url, data=[data[1], data[1]], format='json')
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+
+    def test_02_titles_ndjson(self, admin_client, client):
+        genres = create_genre(admin_client)
+        categories = create_categories(admin_client)
+        url = '/api/v1/titles/_bulk/'
+        items = [
+            {'name': f'Сериал {idx}', 'year': 2000 + idx,
+             'genre': [genres[0]['slug'], genres[idx % 3]['slug']],
+             'category': categories[idx % 2]['slug']}
+            for idx in range(4)
+        ]
+        body = '\n'.join(json.dumps(item) for item in items)
+        response = admin_client.post(
+            url, data=body, content_type='application/x-ndjson')
+        assert response.status_code == HTTPStatus.OK, response.json()
+        assert response.json() == {'created': 4, 'updated': 0}
+
+        titles = client.get('/api/v1/titles/?year=2001').json()['results']
+        assert len(titles) == 1
+        assert {genre['slug'] for genre in titles[0]['genre']} == {
+            genres[0]['slug'], genres[1]['slug']}
+
+        update = [{'id': titles[0]['id'], 'name': 'Сериал 1, сезон 2',
+                   'year': 2001, 'genre': [genres[2]['slug']],
+                   'category': categories[0]['slug']}]
+        response = admin_client.post(url, data=update, format='json')
+        assert response.json() == {'created': 0, 'updated': 1}
+        title = client.get(f'/api/v1/titles/{titles[0]["id"]}/').json()
+        assert title['name'] == 'Сериал 1, сезон 2'
+        assert [genre['slug'] for genre in title['genre']] == [
+            genres[2]['slug']]
+        assert client.get('/api/v1/titles/?name=СЕЗОН').json()['count'] == 1
+
+        response = admin_client.post(url, data=[
+            dict(items[0], genre=['unknown'])], format='json')
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+        assert 'genre' in response.json()[0]
+
+        response = admin_client.post(url, data=update * 2, format='json')
+        assert response.status_code == HTTPStatus.BAD_REQUEST, (
+            'Пакет, в котором повторяется id произведения, должен '
+            'отклоняться со статусом 400.'
+        )
+
+    def test_03_bulk_route_does_not_shadow_slugs(self, admin_client):
+        for url in ('/api/v1/genres/', '/api/v1/categories/'):
+            response = admin_client.post(url, data={'name': 'Пачка',
+                                                    'slug': 'bulk'})
+            assert response.status_code == HTTPStatus.CREATED
+            response = admin_client.delete(f'{url}bulk/')
+            assert response.status_code == HTTPStatus.NO_CONTENT, (
+                f'Объект со slug `bulk` должен удаляться через `{url}bulk/`: '
+                'пакетная запись не должна занимать этот адрес.'
+            )
+            response = admin_client.post(url, data={'name': 'Пачка',
+                                                    'slug': '_bulk'})
+            assert response.status_code == HTTPStatus.BAD_REQUEST, (
+                'slug, начинающийся с `_`, совпадает со служебными '
+                'адресами API и должен отклоняться.'
+            )
+            response = admin_client.post(
+                f'{url}_bulk/', data=[{'name': 'Пачка', 'slug': '_x'}],
+                format='json')
+            assert response.status_code == HTTPStatus.BAD_REQUEST
@@ -0,0 +1,47 @@
+import csv
+import io
+import json
+from http import HTTPStatus
+
+import pytest
+
+from tests.utils import create_single_review, create_titles
+
+
+def read_stream(response):
+    return b''.join(response.streaming_content).decode()
+
+
+@pytest.mark.django_db(transaction=True)
+class Test17TitleExport:
+    url = '/api/v1/titles/export/'
+
+    def test_01_export_permissions(self, client, user_client):
+        assert client.get(self.url).status_code == HTTPStatus.UNAUTHORIZED
+        assert user_client.get(self.url).status_code == HTTPStatus.FORBIDDEN
+
+    def test_02_export_ndjson_and_csv(self, admin_client, user_client):
+        titles, categories, genres = create_titles(admin_client)
+        create_single_review(user_client, titles[0]['id'], 'review', 8)
+
+        response = admin_client.get(self.url)
+        assert response.status_code == HTTPStatus.OK
+        assert response.streaming, (
+            f'Эндпоинт `{self.url}` должен отдавать данные потоком.'
+        )
+        rows = [json.loads(line)
+                for line in read_stream(response).splitlines()]
+        assert [row['id'] for row in rows] == [
+            title['id'] for title in titles]
+        assert rows[0]['genre'] == sorted(titles[0]['genre'])
+        assert rows[0]['category'] == titles[0]['category']
+        assert (rows[0]['rating'], rows[0]['rating_count']) == (8, 1)
+
+        response = admin_client.get(self.url, {'output': 'csv',
+                                               'year': 1988})
+        assert response['Content-Type'].startswith('text/csv')
+        rows = list(csv.DictReader(io.StringIO(read_stream(response))))
+        assert len(rows) == 1 and rows[0]['name'] == titles[1]['name']
+
+        response = admin_client.get(self.url, {'output': 'xml'})
+        assert response.status_code == HTTPStatus.BAD_REQUEST
@@ -0,0 +1,41 @@
+from http import HTTPStatus
+
+import pytest
+
+from tests.utils import create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test18Metrics:
+    url = '/api/v1/_metrics'
+
+    def test_01_metrics_permissions(self, client, user_client):
+        assert client.get(self.url).status_code == HTTPStatus.UNAUTHORIZED
+        assert user_client.get(self.url).status_code == HTTPStatus.FORBIDDEN
+
+    def test_02_requests_profiled_by_route(self, settings, admin_client):
+        from api import metrics
+
+        settings.PROFILING_ENABLED = True
+        metrics.reset()
+        create_titles(admin_client)
+        admin_client.get('/api/v1/titles/')
+        admin_client.get('/api/v1/titles/')
+
+        response = admin_client.get(self.url)
+        assert response.status_code == HTTPStatus.OK
+        assert response['Content-Type'].startswith('text/plain')
+        body = response.content.decode()
+        assert 'api_request_duration_seconds_count{route="Title-list"} 4' in (
+            body
+        ), (
+            'Метрики должны собираться по имени маршрута: два POST и '
+            'два GET к `/api/v1/titles/`.'
+        )
+        for name in ('api_request_db_seconds', 'api_request_render_seconds',
+                     'api_request_queries'):
+            assert f'{name}_count{{route="Title-list"}} 4' in body
+        assert 'api_request_queries_bucket{route="Title-list",le="+Inf"}' in (
+            body
+        )
+        assert 'email_outbox_queue_depth 0' in body
@@ -0,0 +1,43 @@
+import json
+from io import StringIO
+
+import pytest
+from django.core.management import CommandError, call_command
+
+
+@pytest.mark.django_db(transaction=True)
+class Test19BenchApi:
+
+    def test_01_report_and_rollback(self, tmp_path):
+        from reviews.models import Review, Title
+
+        report_path = tmp_path / 'bench.json'
+        call_command('bench_api', titles=30, reviews=60, comments=20,
+                     users=5, requests=3, output=str(report_path),
+                     stderr=StringIO())
+        report = json.loads(report_path.read_text(encoding='utf-8'))
+        assert report['dataset']['titles'] == 30
+        endpoints = report['endpoints']
+        for name in ('title-list', 'title-detail', 'review-list',
+                     'comment-list', 'review-create'):
+            assert name in endpoints, (
+                f'Отчёт `bench_api` должен содержать эндпоинт `{name}`.'
+            )
+            result = endpoints[name]
+            assert result['requests'] == 3
+            assert result['status'][0] < 300
+            assert 0 < result['p50_ms'] <= result['p95_ms']
+            # Карточка произведения после прогрева отдаётся из снимка в кэше.
+            if name != 'title-detail':
+                assert result['queries'] >= 1
+            assert result['peak_memory_kb'] > 0
+        assert not Title.objects.exists() and not Review.objects.exists(), (
+            'Синтетические данные `bench_api` должны откатываться.'
+        )
+
+        endpoints['title-list']['queries'] = 0
+        report_path.write_text(json.dumps(report), encoding='utf-8')
+        with pytest.raises(CommandError, match='title-list'):
+            call_command('bench_api', titles=30, reviews=60, comments=20,
+                         users=5, requests=3, baseline=str(report_path),
+                         stdout=StringIO(), stderr=StringIO())
@@ -0,0 +1,81 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from tests.utils import create_reviews, create_titles
+
+
+def get_with_queries(client, url):
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url)
+    assert response.status_code == HTTPStatus.OK, (
+        f'GET-запрос к `{url}` должен вернуть ответ со статусом 200.'
+    )
+    return response.json(), context.captured_queries
+
+
+@pytest.mark.django_db(transaction=True)
+class Test20SparseFields:
+
+    def test_01_title_fields(self, admin_client, client):
+        titles, _, _ = create_titles(admin_client)
+        url = '/api/v1/titles/'
+        full, full_queries = get_with_queries(client, url)
+        data, queries = get_with_queries(client, f'{url}?fields=id,name')
+        assert data['count'] == full['count'] == len(titles)
+        assert set(data['results'][0]) == {'id', 'name'}, (
+            'Параметр `fields` должен оставлять в ответе только '
+            'перечисленные поля.'
+        )
+        assert len(queries) < len(full_queries), (
+            'Без вложенных жанров выборка не должна делать prefetch.'
+        )
+        title_sql = queries[-1]['sql']
+        assert 'description' not in title_sql, (
+            'Колонки, не попавшие в `fields`, не должны загружаться из БД.'
+        )
+
+        data, _ = get_with_queries(client, f'{url}{titles[0]["id"]}/'
+                                           '?fields=name,category')
+        assert data['name'] == titles[0]['name']
+        assert data['category']['slug'] == titles[0]['category']
+        assert set(data) == {'name', 'category'}
+
+    def test_02_title_expand(self, admin_client, client):
+        titles, _, _ = create_titles(admin_client)
+        url = f'/api/v1/titles/{titles[0]["id"]}/'
+        data, _ = get_with_queries(client, f'{url}?expand=category')
+        assert sorted(data['genre']) == sorted(titles[0]['genre']), (
+            'Связи, не перечисленные в `expand`, должны выводиться slug.'
+        )
+        assert data['category']['slug'] == titles[0]['category']
+        data, _ = get_with_queries(client, f'{url}?expand=')
+        assert data['category'] == titles[0]['category']
+
+        for query in ('fields=id,secret', 'expand=description'):
+            response = client.get(f'{url}?{query}')
+            assert response.status_code == HTTPStatus.BAD_REQUEST, (
+                'Неизвестные поля в `fields` и `expand` должны приводить к '
+                'ответу со статусом 400.'
+            )
+
+    def test_03_review_and_comment_fields(self, admin_client, admin,
+                                          user_client, user):
+        reviews, titles = create_reviews(
+            admin_client, {admin: admin_client, user: user_client})
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        data, _ = get_with_queries(admin_client, f'{url}?fields=id,score')
+        assert all(set(item) == {'id', 'score'}
+                   for item in data['results'])
+        response = user_client.patch(f'{url}{reviews[1]["id"]}/?fields=id',
+                                     data={'text': 'Новый текст'})
+        assert response.status_code == HTTPStatus.OK
+        assert response.json()['text'] == 'Новый текст', (
+            '`fields` не должен влиять на запросы на запись.'
+        )
+        data, _ = get_with_queries(
+            admin_client,
+            f'{url}{reviews[0]["id"]}/comments/?fields=text')
+        assert data['count'] == 0
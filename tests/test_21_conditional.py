@@ -0,0 +1,84 @@
+from http import HTTPStatus
+
+import pytest
+
+from tests.utils import create_reviews, create_single_review, create_titles
+
+
+def get_etag(client, url):
+    response = client.get(url)
+    assert response.status_code == HTTPStatus.OK
+    assert response.has_header('ETag'), (
+        f'GET-запрос к `{url}` должен возвращать заголовок ETag.'
+    )
+    return response['ETag']
+
+
+def assert_not_modified(client, url, etag):
+    response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.NOT_MODIFIED, (
+        f'GET-запрос к `{url}` с актуальным If-None-Match должен '
+        'возвращать ответ со статусом 304.'
+    )
+    assert not response.content
+    assert response['ETag'] == etag
+
+
+@pytest.mark.django_db(transaction=True)
+class Test21ConditionalRequests:
+
+    def test_01_titles(self, admin_client, user_client, client):
+        titles, _, genres = create_titles(admin_client)
+        list_url = '/api/v1/titles/'
+        detail_url = f'{list_url}{titles[0]["id"]}/'
+        list_etag = get_etag(client, list_url)
+        detail_etag = get_etag(client, detail_url)
+        assert_not_modified(client, list_url, list_etag)
+        assert_not_modified(client, detail_url, detail_etag)
+        assert client.get(detail_url).has_header('Last-Modified')
+        assert get_etag(client, f'{list_url}?fields=id') != list_etag
+
+        create_single_review(user_client, titles[0]['id'], 'Отзыв', 9)
+        assert get_etag(client, detail_url) != detail_etag, (
+            'Новый отзыв меняет рейтинг, поэтому должен менять ETag '
+            'произведения.'
+        )
+        list_etag = get_etag(client, list_url)
+        response = admin_client.post(
+            '/api/v1/genres/_bulk/', format='json',
+            data=[{'slug': genres[0]['slug'], 'name': 'Новое имя'}])
+        assert response.status_code == HTTPStatus.OK
+        assert get_etag(client, list_url) != list_etag, (
+            'Переименование жанра должно менять ETag списка произведений, '
+            'в котором этот жанр выводится.'
+        )
+        list_etag = get_etag(client, list_url)
+        admin_client.delete(f'/api/v1/titles/{titles[1]["id"]}/')
+        assert get_etag(client, list_url) != list_etag
+
+    def test_02_reviews_follow_author_name(self, admin_client, admin,
+                                           user_client, user):
+        _, titles = create_reviews(admin_client,
+                                   {admin: admin_client, user: user_client})
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        etag = get_etag(admin_client, url)
+        assert_not_modified(admin_client, url, etag)
+        assert_not_modified(admin_client, f'{url}?pagination=cursor',
+                            get_etag(admin_client, f'{url}?pagination=cursor'))
+
+        response = admin_client.patch(f'/api/v1/users/{user.username}/',
+                                      data={'username': 'renamed'})
+        assert response.status_code == HTTPStatus.OK
+        assert get_etag(admin_client, url) != etag, (
+            'Смена имени автора должна менять ETag его отзывов.'
+        )
+
+    def test_03_cached_genre_list(self, admin_client, client):
+        create_titles(admin_client)
+        url = '/api/v1/genres/'
+        etag = get_etag(client, url)
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.NOT_MODIFIED
+        assert response['X-Cache'] == 'HIT'
+        admin_client.post(url, data={'name': 'Вестерн', 'slug': 'western'})
+        assert get_etag(client, url) != etag
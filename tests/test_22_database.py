@@ -0,0 +1,47 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import DatabaseError, connection
+
+
+@pytest.mark.django_db(transaction=True)
+class Test22Database:
+    url = '/api/v1/_health'
+
+    def test_01_sqlite_pragmas(self, settings):
+        if connection.vendor != 'sqlite':
+            pytest.skip('Прагмы применяются только к SQLite.')
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA synchronous')
+            synchronous = cursor.fetchone()[0]
+            cursor.execute('PRAGMA cache_size')
+            cache_size = cursor.fetchone()[0]
+        assert synchronous == 1, (
+            'Новые соединения с SQLite должны получать synchronous=NORMAL.'
+        )
+        assert cache_size == settings.SQLITE_PRAGMAS['cache_size']
+
+    def test_02_health(self, client, admin_client):
+        response = client.get(self.url)
+        assert response.status_code == HTTPStatus.OK
+        assert response.json() == {'status': 'ok'}, (
+            'Анонимный health check не должен раскрывать детали БД.'
+        )
+
+        response = admin_client.get(self.url)
+        database = response.json()['database']
+        assert database['vendor'] == connection.vendor
+        assert database['connections']['open'] >= 1
+        assert database['connections']['created'] >= 1
+        assert 'conn_max_age' in database
+
+    def test_03_health_unavailable(self, client, monkeypatch):
+        from api import db
+
+        def broken():
+            raise DatabaseError('нет соединения')
+
+        monkeypatch.setattr(db, 'check_database', broken)
+        response = client.get(self.url)
+        assert response.status_code == HTTPStatus.SERVICE_UNAVAILABLE
+        assert response.json() == {'status': 'unavailable'}
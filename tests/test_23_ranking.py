@@ -0,0 +1,145 @@
+from http import HTTPStatus
+
+import pytest
+
+from tests.utils import create_single_review, create_titles
+
+
+def top(client, query=''):
+    response = client.get(f'/api/v1/titles/top/{query}')
+    assert response.status_code == HTTPStatus.OK, response.json()
+    return [(item['title']['id'], item['score']) for item in response.json()]
+
+
+@pytest.mark.django_db(transaction=True)
+class Test23Ranking:
+
+    @pytest.fixture
+    def catalog(self, admin_client, user_client, moderator_client):
+        titles, categories, genres = create_titles(admin_client)
+        response = admin_client.post('/api/v1/titles/', data={
+            'name': 'Провал', 'year': 2000, 'genre': [genres[2]['slug']],
+            'category': categories[1]['slug'],
+        })
+        titles.append(response.json())
+        create_single_review(user_client, titles[0]['id'], 'Шедевр', 10)
+        for client, score in ((admin_client, 10), (user_client, 10),
+                              (moderator_client, 9)):
+            create_single_review(client, titles[1]['id'], 'Хорошо', score)
+        reviews = [
+            create_single_review(client, titles[2]['id'], 'Плохо', 1).json()
+            for client in (admin_client, user_client, moderator_client)
+        ]
+        return titles, categories, genres, reviews
+
+    def test_01_bayesian_order(self, client, catalog):
+        titles, categories, genres, _ = catalog
+        # Априорная средняя 5.5 с весом 10 оценок.
+        assert top(client) == [
+            (titles[1]['id'], round(84 / 13, 2)),
+            (titles[0]['id'], round(65 / 11, 2)),
+            (titles[2]['id'], round(58 / 13, 2)),
+        ], (
+            'Эндпоинт `/api/v1/titles/top/` должен упорядочивать '
+            'произведения по байесовской оценке: одна оценка 10 не должна '
+            'обгонять три оценки 10, 10 и 9.'
+        )
+        assert [item[0] for item in top(
+            client, f'?genre={genres[2]["slug"]}')] == [
+            titles[1]['id'], titles[2]['id']]
+        assert [item[0] for item in top(
+            client, f'?category={categories[0]["slug"]}')] == [
+            titles[0]['id']]
+        assert [item[0] for item in top(client, '?year=2000')] == [
+            titles[2]['id']]
+        assert len(top(client, '?limit=2')) == 2
+        item = client.get('/api/v1/titles/top/?limit=1').json()[0]
+        assert item['rating_count'] == 3
+        assert item['title']['name'] == titles[1]['name']
+
+    def test_02_incremental_refresh(self, admin_client, user_client,
+                                    moderator_client, client, catalog):
+        titles, _, genres, reviews = catalog
+        response = moderator_client.patch(
+            f'/api/v1/titles/{titles[2]["id"]}/reviews/{reviews[2]["id"]}/',
+            data={'score': 10})
+        assert response.status_code == HTTPStatus.OK
+        assert dict(top(client))[titles[2]['id']] == round(67 / 13, 2), (
+            'Изменение оценки должно обновлять рейтинг произведения.'
+        )
+
+        review_id = client.get(
+            f'/api/v1/titles/{titles[0]["id"]}/reviews/').json()[
+            'results'][0]['id']
+        admin_client.delete(
+            f'/api/v1/titles/{titles[0]["id"]}/reviews/{review_id}/')
+        assert titles[0]['id'] not in dict(top(client)), (
+            'Произведение без отзывов не должно попадать в рейтинг.'
+        )
+
+        admin_client.patch(f'/api/v1/titles/{titles[1]["id"]}/',
+                           data={'genre': [genres[0]['slug']]})
+        assert [item[0] for item in top(
+            client, f'?genre={genres[2]["slug"]}')] == [titles[2]['id']], (
+            'Смена жанров произведения должна обновлять рейтинг по жанрам.'
+        )
+
+    def test_03_invalid_params(self, client, catalog):
+        _, _, genres, _ = catalog
+        for query in (f'?genre={genres[0]["slug"]}&year=2000',
+                      '?genre=unknown', '?limit=0', '?limit=1000'):
+            response = client.get(f'/api/v1/titles/top/{query}')
+            assert response.status_code == HTTPStatus.BAD_REQUEST, query
+
+    def test_04_cascade_delete(self, admin_client, client, catalog):
+        titles, _, genres, _ = catalog
+        response = admin_client.delete('/api/v1/users/TestUser/')
+        assert response.status_code == HTTPStatus.NO_CONTENT
+        assert top(client) == [
+            (titles[1]['id'], round(74 / 12, 2)),
+            (titles[2]['id'], round(57 / 12, 2)),
+        ], (
+            'Отзывы, удалённые каскадом вместе с автором, не должны '
+            'учитываться в рейтинге.'
+        )
+        assert client.get('/api/v1/titles/top/?limit=1').json()[0][
+            'rating_count'] == 2
+
+        response = admin_client.delete(f'/api/v1/titles/{titles[1]["id"]}/')
+        assert response.status_code == HTTPStatus.NO_CONTENT
+        assert top(client) == [(titles[2]['id'], round(57 / 12, 2))]
+        assert [item[0] for item in top(
+            client, f'?genre={genres[2]["slug"]}')] == [titles[2]['id']]
+
+    def test_05_author_delete_reranks_in_batch(self, admin_client,
+                                               django_user_model):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from reviews import ranking
+        from reviews.models import Review, Title
+
+        def ranking_queries(count):
+            author = django_user_model.objects.create_user(
+                username=f'author_{count}',
+                email=f'author_{count}@yamdb.fake')
+            titles = [Title.objects.create(name=f'Произведение {idx}',
+                                           year=2000)
+                      for idx in range(count)]
+            Review.objects.bulk_create(
+                Review(title=title, author=author, text='Текст', score=7)
+                for title in titles)
+            Title.objects.rebuild_rating()
+            ranking.rebuild()
+            with CaptureQueriesContext(connection) as context:
+                response = admin_client.delete(
+                    f'/api/v1/users/{author.username}/')
+            assert response.status_code == HTTPStatus.NO_CONTENT
+            return len([
+                query for query in context.captured_queries
+                if 'ranking"' in query['sql']
+            ])
+
+        assert ranking_queries(2) == ranking_queries(6), (
+            'Таблицы рейтинга после удаления автора должны пересчитываться '
+            'одной пачкой, а не по запросу на каждый его отзыв.'
+        )
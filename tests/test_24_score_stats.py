@@ -0,0 +1,128 @@
+from http import HTTPStatus
+
+import pytest
+from django.core.management import call_command
+
+from tests.utils import create_single_review, create_titles
+
+
+def stats(client, title_id):
+    response = client.get(f'/api/v1/titles/{title_id}/stats/')
+    assert response.status_code == HTTPStatus.OK, (
+        'Эндпоинт `/api/v1/titles/{title_id}/stats/` должен быть доступен '
+        'без авторизации.'
+    )
+    data = response.json()
+    data['histogram'] = {
+        int(score): count for score, count in data['histogram'].items()
+        if count
+    }
+    return data
+
+
+@pytest.mark.django_db(transaction=True)
+class Test24ScoreStats:
+
+    def test_01_summary(self, admin_client, user_client, moderator_client,
+                        client):
+        titles, _, _ = create_titles(admin_client)
+        title_id = titles[0]['id']
+        assert stats(client, title_id) == {
+            'histogram': {}, 'count': 0, 'mean': None, 'median': None,
+        }, 'У произведения без отзывов нет ни среднего, ни медианы.'
+        for http_client, score in ((admin_client, 2), (user_client, 9),
+                                   (moderator_client, 9)):
+            create_single_review(http_client, title_id, 'Текст', score)
+        assert stats(client, title_id) == {
+            'histogram': {2: 1, 9: 2}, 'count': 3, 'mean': 6.67,
+            'median': 9,
+        }, (
+            'Эндпоинт `/api/v1/titles/{title_id}/stats/` должен отдавать '
+            'гистограмму, число, среднее и медиану оценок.'
+        )
+        assert stats(client, titles[1]['id'])['count'] == 0, (
+            'Отзывы одного произведения не должны попадать в статистику '
+            'другого.'
+        )
+
+    def test_02_incremental_update(self, admin_client, user_client, client):
+        titles, _, _ = create_titles(admin_client)
+        title_id = titles[0]['id']
+        url = f'/api/v1/titles/{title_id}/reviews/'
+        review = create_single_review(admin_client, title_id, 'Текст',
+                                      4).json()
+        create_single_review(user_client, title_id, 'Текст', 7)
+        assert stats(client, title_id)['median'] == 5.5, (
+            'Медиана чётного числа оценок — среднее двух средних.'
+        )
+
+        admin_client.patch(f'{url}{review["id"]}/', data={'score': 10})
+        assert stats(client, title_id)['histogram'] == {7: 1, 10: 1}, (
+            'Изменение оценки должно переносить её в другой столбец '
+            'гистограммы.'
+        )
+
+        admin_client.delete(f'{url}{review["id"]}/')
+        data = stats(client, title_id)
+        assert (data['histogram'], data['count'], data['mean']) == (
+            {7: 1}, 1, 7), 'Удаление отзыва должно убирать его оценку.'
+
+        call_command('rebuild_ratings')
+        assert stats(client, title_id)['histogram'] == {7: 1}, (
+            'Пересчёт должен совпадать с инкрементальными счётчиками.'
+        )
+
+    def test_03_missing_title(self, client):
+        response = client.get('/api/v1/titles/999/stats/')
+        assert response.status_code == HTTPStatus.NOT_FOUND, (
+            'Для несуществующего произведения статистика должна отдавать '
+            '404.'
+        )
+
+    def test_04_cascade_delete(self, admin_client, user_client,
+                               moderator_client, client):
+        titles, _, _ = create_titles(admin_client)
+        title_id = titles[0]['id']
+        create_single_review(user_client, title_id, 'Текст', 10)
+        create_single_review(moderator_client, title_id, 'Текст', 2)
+
+        response = admin_client.delete('/api/v1/users/TestUser/')
+        assert response.status_code == HTTPStatus.NO_CONTENT
+        data = stats(client, title_id)
+        assert (data['histogram'], data['count'], data['median']) == (
+            {2: 1}, 1, 2), (
+            'Отзывы, удалённые каскадом вместе с автором, должны уходить '
+            'из гистограммы оценок.'
+        )
+
+    def test_05_author_delete_recounts_in_batch(self, admin_client,
+                                                  django_user_model):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from reviews import stats as score_stats
+        from reviews.models import Review, Title
+
+        def delete_queries(count):
+            author = django_user_model.objects.create_user(
+                username=f'author_{count}',
+                email=f'author_{count}@yamdb.fake')
+            titles = [Title.objects.create(name=f'Произведение {idx}',
+                                           year=2000)
+                      for idx in range(count)]
+            Review.objects.bulk_create(
+                Review(title=title, author=author, text='Текст', score=7)
+                for title in titles)
+            Title.objects.rebuild_rating()
+            score_stats.rebuild()
+            with CaptureQueriesContext(connection) as context:
+                response = admin_client.delete(
+                    f'/api/v1/users/{author.username}/')
+            assert response.status_code == HTTPStatus.NO_CONTENT
+            return len(context.captured_queries)
+
+        # Рейтинг снимается одним UPDATE на произведение, остальное —
+        # пачкой на всех.
+        assert delete_queries(6) - delete_queries(2) <= 6 - 2, (
+            'Удаление автора должно стоить не больше одного запроса на '
+            'произведение с его отзывом.'
+        )
@@ -0,0 +1,128 @@
+import threading
+import time
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from tests.utils import create_single_review, create_titles
+
+
+def get_title(client, title_id):
+    url = f'/api/v1/titles/{title_id}/'
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url)
+    assert response.status_code == HTTPStatus.OK, (
+        f'GET-запрос к `{url}` должен вернуть ответ со статусом 200.'
+    )
+    return response.json(), len(context.captured_queries)
+
+
+@pytest.mark.django_db(transaction=True)
+class Test25TitleSnapshot:
+
+    def test_01_repeated_detail_skips_database(self, admin_client, client):
+        titles, _, _ = create_titles(admin_client)
+        first, queries = get_title(client, titles[0]['id'])
+        assert queries > 0
+        second, queries = get_title(client, titles[0]['id'])
+        assert (second, queries) == (first, 0), (
+            'Повторный GET-запрос к произведению должен отдаваться из '
+            'снимка в кэше без запросов к БД.'
+        )
+        response = client.get(f'/api/v1/titles/{titles[0]["id"]}/',
+                              HTTP_IF_NONE_MATCH=client.get(
+                                  f'/api/v1/titles/{titles[0]["id"]}/'
+                              )['ETag'])
+        assert response.status_code == HTTPStatus.NOT_MODIFIED
+        data = client.get(
+            f'/api/v1/titles/{titles[0]["id"]}/?fields=id,name').json()
+        assert data == {'id': titles[0]['id'], 'name': titles[0]['name']}, (
+            'Параметр ?fields= должен работать и при наличии снимка.'
+        )
+        assert client.get('/api/v1/titles/999/').status_code == (
+            HTTPStatus.NOT_FOUND)
+
+    def test_02_writes_refresh_snapshot(self, admin_client, user_client,
+                                        client):
+        titles, _, genres = create_titles(admin_client)
+        title_id = titles[0]['id']
+        get_title(client, title_id)
+
+        admin_client.patch(f'/api/v1/titles/{title_id}/',
+                           data={'name': 'Терминатор 2'})
+        assert get_title(client, title_id)[0]['name'] == 'Терминатор 2', (
+            'Правка произведения должна обновлять его снимок.'
+        )
+
+        create_single_review(user_client, title_id, 'Отзыв', 9)
+        assert get_title(client, title_id)[0]['rating'] == 9, (
+            'Новый отзыв должен обновлять рейтинг в снимке произведения.'
+        )
+
+        admin_client.post('/api/v1/genres/_bulk/', format='json',
+                          data=[{'slug': genres[0]['slug'],
+                                 'name': 'Новое имя'}])
+        assert 'Новое имя' in [
+            genre['name'] for genre in get_title(client, title_id)[0]['genre']
+        ], 'Переименование жанра должно обновлять снимки произведений.'
+
+        admin_client.patch(f'/api/v1/titles/{title_id}/',
+                           data={'genre': [genres[2]['slug']]})
+        assert [genre['slug'] for genre in get_title(
+            client, title_id)[0]['genre']] == [genres[2]['slug']], (
+            'Смена жанров произведения должна обновлять его снимок.'
+        )
+
+        admin_client.delete(f'/api/v1/titles/{title_id}/')
+        assert client.get(f'/api/v1/titles/{title_id}/').status_code == (
+            HTTPStatus.NOT_FOUND), (
+            'Удалённое произведение не должно отдаваться из снимка.'
+        )
+
+    def test_03_single_rebuild_under_lock(self, settings):
+        from api.cache import _snapshot_key, get_cache, get_title_snapshot
+
+        cache = get_cache()
+        lock_key = f'{_snapshot_key(1)}:lock'
+        calls = []
+
+        def build():
+            calls.append(1)
+            return 'снимок'
+
+        cache.add(lock_key, 1)
+        timer = threading.Timer(0.2, lambda: (
+            cache.set(_snapshot_key(1), 'готовый снимок'),
+            cache.delete(lock_key)))
+        timer.start()
+        assert get_title_snapshot(1, build) == 'готовый снимок'
+        timer.join()
+        assert not calls, (
+            'Пока снимок пересчитывает держатель блокировки, остальные '
+            'запросы должны ждать его результат, а не считать заново.'
+        )
+
+        settings.TITLE_SNAPSHOT_LOCK_TIMEOUT = 0.1
+        cache.add(f'{_snapshot_key(2)}:lock', 1)
+        assert get_title_snapshot(2, build) == 'снимок'
+        assert cache.get(_snapshot_key(2)) is None, (
+            'После таймаута ожидания снимок считается без записи в кэш.'
+        )
+
+    def test_04_snapshot_expires(self, admin_client, client, settings):
+        from reviews.models import Title
+
+        settings.TITLE_SNAPSHOT_TIMEOUT = 1
+        titles, _, _ = create_titles(admin_client)
+        title_id = titles[0]['id']
+        get_title(client, title_id)
+        # Запись другим процессом: сброс версий сюда не доходит.
+        Title.objects.filter(pk=title_id).update(name='Чужая правка')
+        assert get_title(client, title_id)[0]['name'] == titles[0]['name']
+        time.sleep(1.1)
+        assert get_title(client, title_id)[0]['name'] == 'Чужая правка', (
+            'Снимок должен жить не дольше TITLE_SNAPSHOT_TIMEOUT, даже '
+            'если сброс версии до этого процесса не дошёл.'
+        )
@@ -0,0 +1,53 @@
+from http import HTTPStatus
+from importlib import import_module
+
+import pytest
+
+from tests.utils import create_titles
+
+
+def filter_names(client, name):
+    response = client.get('/api/v1/titles/', {'name': name})
+    assert response.status_code == HTTPStatus.OK
+    return {title['name'] for title in response.json()['results']}
+
+
+@pytest.mark.django_db(transaction=True)
+class Test26TitleNameFilter:
+
+    def test_01_name_filter_ignores_case(self, admin_client, client):
+        titles, _, _ = create_titles(admin_client)
+        for name in ('терминатор', 'ТЕРМИНАТОР', 'мИНАт'):
+            assert filter_names(client, name) == {titles[0]['name']}, (
+                'Фильтр `?name=` должен находить произведение по части '
+                'названия на кириллице без учёта регистра.'
+            )
+        assert filter_names(client, 'ОРЕШЕК') == {titles[1]['name']}
+        assert filter_names(client, 'Чужой') == set()
+
+    def test_02_name_search_filled_on_every_write(self, admin_client,
+                                                  client):
+        from django.apps import apps
+        from reviews.models import Title
+
+        titles, _, _ = create_titles(admin_client)
+        Title.objects.bulk_create([Title(name='Бегущий По Лезвию',
+                                         year=1982)])
+        assert dict(Title.objects.values_list('name', 'name_search')) == {
+            titles[0]['name']: 'терминатор',
+            titles[1]['name']: 'крепкий орешек',
+            'Бегущий По Лезвию': 'бегущий по лезвию',
+        }, (
+            'name_search должно заполняться и при записи через API, '
+            'и через bulk_create.'
+        )
+        assert filter_names(client, 'ЛЕЗВИЮ') == {'Бегущий По Лезвию'}
+
+        Title.objects.update(name_search='')
+        migration = import_module(
+            'reviews.migrations.0008_title_filter_indexes')
+        migration.fill_name_search(apps, None)
+        assert set(Title.objects.values_list('name_search', flat=True)) == {
+            'терминатор', 'крепкий орешек', 'бегущий по лезвию'}, (
+            'Миграция должна заполнять name_search у существующих строк.'
+        )